@@ -1,10 +1,16 @@
 
+import functools
 from markupsafe import Markup
 from django import forms
 from djingles import html
 from djingles.forms.widgets import AbstractThemedWidget, ChoiceWidgetMixin
 
 
+@functools.lru_cache(maxsize=None)
+def _empty_errors(css_class):
+    return html.static_element("ul", css_class).compile()
+
+
 class BootstrapWidget(AbstractThemedWidget):
 
     error_class = "field-errors"
@@ -40,13 +46,15 @@ class BootstrapWidget(AbstractThemedWidget):
         help_text = field.help_text
         if not help_text:
             return ""
-        return html.div(class_=self.help_class)[
+        return html.static_element("div", self.help_class)[
             field.help_text
             ]
 
     def render_errors(self, field):
         errors = field.errors
-        return html.ul(class_=self.error_class)[
+        if not errors:
+            return _empty_errors(self.error_class)
+        return html.static_element("ul", self.error_class)[
             [html.li[err] for err in errors]
         ]
 
@@ -65,14 +73,11 @@ class BootstrapWidget(AbstractThemedWidget):
         if suffix is None:
             suffix = self.get_form_property(field, "form_input_suffix")
         if prefix or suffix:
-            content = html.div(class_="input-group")[
-                html.div(class_="input-group-prepend", if_=prefix is not None)[
-                    html.span(class_="input-group-text")[prefix]
-                ],
+            addon = html.static_element("span", "input-group-text")
+            content = html.static_element("div", "input-group")[
+                html.static_element("div", "input-group-prepend")[addon[prefix]] if prefix is not None else None,
                 content,
-                html.div(class_="input-group-append", if_=suffix is not None)[
-                    html.span(class_="input-group-text")[suffix]
-                ]
+                html.static_element("div", "input-group-append")[addon[suffix]] if suffix is not None else None
             ]
         return content
 
@@ -159,7 +164,7 @@ class CheckboxInput(BootstrapWidget, forms.CheckboxInput):
         else:
             field.field.widget.attrs['class'] = html.add_css_class(field.field.widget.attrs.get("class", ""), "form-check-input")
             field.field.label = ""
-            return html.div(class_="form-check")[
+            return html.static_element("div", "form-check")[
                 field.as_widget(),
                 html.label(class_=self.label_class, for_=field.id_for_label)[
                     field.label
@@ -0,0 +1,78 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models.query import QuerySet
+from django.utils import timezone, translation
+
+
+__all__ = ['evaluate', 'evaluate_concurrently', 'get_executor']
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    The process wide pool used for context evaluation, sized by
+    ``settings.CONCURRENT_CONTEXT_WORKERS``.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=getattr(settings, "CONCURRENT_CONTEXT_WORKERS", 8),
+                                               thread_name_prefix="djingles-context")
+    return _executor
+
+
+def evaluate(value):
+    """
+    Querysets (also the ``source`` of formatters and the ``object_list`` of pages) are
+    fetched into their result cache, callables are called, anything else is returned
+    as is.
+    """
+    if callable(value) and not isinstance(value, QuerySet):
+        return value()
+    for item in (value, getattr(value, "source", None), getattr(value, "object_list", None)):
+        if isinstance(item, QuerySet):
+            len(item)
+            break
+    return value
+
+
+def _evaluate_in_thread(value, language, tz):
+    close_old_connections()
+    try:
+        with translation.override(language), timezone.override(tz):
+            return evaluate(value)
+    finally:
+        close_old_connections()
+
+
+def _in_transaction():
+    return any(conn.in_atomic_block for conn in connections.all(initialized_only=True))
+
+
+def evaluate_concurrently(values):
+    """
+    Evaluate the values of the dict ``values`` in parallel and return a dict of the
+    results. Each task runs in a pool thread on its own database connection, with
+    the caller's contextvars, language and timezone.
+
+    Inside a transaction the values are evaluated one after the other instead, other
+    connections would not see its uncommitted data.
+    """
+    if len(values) < 2 or _in_transaction():
+        return {key: evaluate(value) for key, value in values.items()}
+    executor = get_executor()
+    language = translation.get_language()
+    tz = timezone.get_current_timezone()
+    futures = {}
+    for key, value in values.items():
+        context = contextvars.copy_context()
+        futures[key] = executor.submit(context.run, _evaluate_in_thread, value, language, tz)
+    return {key: future.result() for key, future in futures.items()}
@@ -82,6 +82,19 @@ class Formatter(object):
         return result
 
 
+def format_value(name, prop, source, owner=None):
+    """
+    The formatted string ``prop`` produces for the attribute ``name`` of ``source``.
+    """
+    try:
+        value = prop.extract(name, source, owner)
+    except AttributeError as ex:
+        raise ValueError("Error while accessing attribute %r in %r : %s" % (name, source, ex))
+    if value is None or value == "":
+        return prop.empty
+    return str(prop.format(value, name, source))
+
+
 class FormattedValue(object):
 
     def __init__(self, name, prop, source, attrs=None, owner=None):
@@ -136,11 +149,7 @@ class FormattedValue(object):
         return self.wrap_content(self.to_str)
 
     def to_str(self):
-        value = self.value
-        if value is None or value == "":
-            return self.prop.empty
-        result = self.prop.format(value, self.name, self.source)
-        return str(result)
+        return format_value(self.name, self.prop, self.source, self.__owner)
 
     def __str__(self):
         return self.to_str()
@@ -435,6 +444,15 @@ class FormattedTable(metaclass=MetaFormattedObject):
             yield FormattedTableRow(index, obj, self)
             index += 1
 
+    def iter_dicts(self):
+        """
+        The rows as dicts of formatted strings by column name, computed straight from
+        the visible columns without building row and value objects.
+        """
+        columns = [(col.name, col.prop) for col in self.columns.visible_columns()]
+        for obj in self.source:
+            yield {name: format_value(name, prop, obj, self) for name, prop in columns}
+
     def __len__(self):
         return len(self.source)
 
@@ -27,6 +27,14 @@ class AbstractThemedWidget(object):
             setattr(cls, cache_name, result)
         return result
 
+    @classmethod
+    def widget_classes(cls):
+        """
+        Themed widget classes below ``cls``, by the name of the django widget they
+        replace. Built once per class.
+        """
+        return cls.__cached_subclasses()
+
     @classmethod
     def __mutate(cls, field):
         subclasses = cls.__cached_subclasses()
@@ -4,12 +4,14 @@ try:
 except ImportError:
     from django.utils.encoding import force_str as force_text
 from django.forms.models import ModelChoiceIteratorValue
-import re
 import json
+import inspect
+import types
+import functools
 from jinja2.utils import markupsafe
 
 
-__all__ = ['html_json', 'html_attrs', "Element", "CssClassList", "CssStyle", 'add_css_class', 'empty']
+__all__ = ['html_json', 'html_attrs', "Element", "Fragment", "static_element", "CssClassList", "CssStyle", 'add_css_class', 'empty']
 
 
 def html_json(values):
@@ -31,9 +33,13 @@ def add_css_class(original_class, *css_classes):
 
 
 class CssClassList(object):
+    """
+    Insertion ordered set of css classes. Strings are split on whitespace so that
+    every class name is stored only once.
+    """
 
     def __init__(self):
-        self.classes = []
+        self.classes = {}
 
     def __iter__(self):
         return iter(self.classes)
@@ -43,26 +49,24 @@ class CssClassList(object):
 
     def copy(self):
         value = CssClassList()
-        value.classes.extend(self.classes)
+        value.classes = self.classes.copy()
         return value
 
     def append(self, value):
         if isinstance(value, str):
-            value = re.sub(r'\s+', ' ', value.strip())
-            if len(value) == 1:
-                value = value[0]
-        if isinstance(value, (tuple, list)):
+            for name in value.split():
+                self.classes[name] = None
+        elif isinstance(value, (tuple, list)):
             for val in value:
                 self.append(val)
-        else:
-            if value not in self.classes:
-                self.classes.append(value)
+        elif value:
+            self.classes[value] = None
 
     def __contains__(self, item):
         return item in self.classes
 
     def __str__(self):
-        return " ".join(str(c) for c in self.classes if c)
+        return " ".join(str(c) for c in self.classes)
 
 
 class CssStyle(dict):
@@ -77,6 +81,7 @@ class CssStyle(dict):
         return CssStyle(super(CssStyle, self).copy())
 
 
+@functools.lru_cache(maxsize=1024)
 def _normalize(key):
     if key.endswith("_"):
         key = key[:-1]
@@ -105,17 +110,37 @@ class HtmlAttr(object):
         self.set(key, value)
 
     def __getitem__(self, item):
-        return dict(self)[item]
+        key = _normalize(item)
+        if key == "class":
+            if self.classes:
+                return str(self.classes)
+        elif key == "style":
+            if self.styles:
+                return self.styles.render()
+        else:
+            return self.attrs[key]
+        raise KeyError(item)
+
+    def __contains__(self, item):
+        key = _normalize(item)
+        if key == "class":
+            return len(self.classes) > 0
+        elif key == "style":
+            return len(self.styles) > 0
+        return key in self.attrs
 
     def __len__(self):
-        return len(dict(self))
+        return len(self.attrs) + (1 if self.classes else 0) + (1 if self.styles else 0)
 
-    def get(self, key):
-        return dict(self).get(key)
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
     def set(self, key, value):
         key = _normalize(key)
-        if key in {"class"}:
+        if key == "class":
             self.classes.append(value)
         elif key == "style":
             if isinstance(value, str):
@@ -130,9 +155,12 @@ class HtmlAttr(object):
             self.attrs[key] = value
 
     def update(self, *args, **attrs):
-        values = {}
-        values.update(*args, **attrs)
-        for k, v in values.items():
+        for values in args:
+            if hasattr(values, "items"):
+                values = values.items()
+            for k, v in values:
+                self.set(k, v)
+        for k, v in attrs.items():
             self.set(k, v)
 
     def __iter__(self):
@@ -162,16 +190,72 @@ class HtmlAttr(object):
         return self.render()
 
 
+class Fragment(object):
+    """
+    Pre-rendered, immutable piece of html. Produced by :meth:`Element.compile`
+    and rendered back as-is.
+    """
+
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content or ""
+
+    def render(self, *args, **kwargs):
+        return self.content
+
+    def __str__(self):
+        return self.content
+
+    def __html__(self):
+        return self.content
+
+
+def _unconsumed(generator):
+    if inspect.getgeneratorstate(generator) == inspect.GEN_CLOSED:
+        raise RuntimeError("A generator child of this element was consumed by an earlier render")
+    return generator
+
+
 class Element(object):
+    """
+    Elements are treated as immutable: calling an element or indexing it returns
+    a new element which shares its attributes with the original until they are
+    modified. Once :attr:`attrib` has been handed out it may change at any time, so
+    the element stops sharing its attributes and caching its start tag.
+    """
 
     def __init__(self, tag):
         self.tag = tag
-        self.attrib = HtmlAttr()
+        self._attrib = HtmlAttr()
+        self._shared = False
+        self._exposed = False
+        self._start_tag = None
         self.children = []
 
+    def _detach(self):
+        if self._shared:
+            self._attrib = self._attrib.copy()
+            self._shared = False
+        self._start_tag = None
+        return self._attrib
+
+    @property
+    def attrib(self):
+        self._exposed = True
+        return self._detach()
+
+    @attrib.setter
+    def attrib(self, value):
+        self._attrib = value
+        self._shared = False
+        self._exposed = True
+        self._start_tag = None
+
     def __call__(self, **kwargs):
         el = self.copy()
-        el.attrib.update(kwargs)
+        if kwargs:
+            el._detach().update(kwargs)
         return el
 
     def __getitem__(self, item):
@@ -183,14 +267,20 @@ class Element(object):
         return el
 
     def copy(self):
-        el = self.__class__(self.tag)
-        el.attrib = self.attrib.copy()
+        el = self.__class__.__new__(self.__class__)
+        el.__dict__.update(self.__dict__)
+        if self._exposed:
+            el._attrib = self._attrib.copy()
+            el._shared = el._exposed = False
+            el._start_tag = None
+        else:
+            el._shared = self._shared = True
         el.children = self.children[:]
         return el
 
     def mutate(self, tag):
         el = tag.copy()
-        el.attrib.update(self.attrib.copy())
+        el._detach().update(self._attrib)
         el.children = self.children[:]
         return el
 
@@ -203,19 +293,117 @@ class Element(object):
         else:
             self.children.append(child)
 
+    def is_static(self):
+        for c in self.children:
+            if isinstance(c, Element):
+                if not c.is_static():
+                    return False
+            elif not isinstance(c, (str, int, float, Fragment)):
+                return False
+        return True
+
+    def compile(self):
+        """
+        Pre-render a subtree made only of elements and plain values into a
+        :class:`Fragment`. Other subtrees are returned as is with their tags rendered,
+        elements derived from them by indexing share the rendered tags. Attributes
+        changed through :attr:`attrib` afterwards are not seen by the fragment.
+        """
+        if self.is_static():
+            return Fragment(self.render())
+        self.get_tag_pair()
+        return self
+
     def convert_to_text(self, el, *args, **kwargs):
         return el.render(*args, **kwargs) if hasattr(el, 'render') else force_text(el)
 
     def render_children(self, *args, **kwargs):
-        return "".join(filter(None, (self.convert_to_text(c, *args, **kwargs)for c in self.children)))
+        out = []
+        self.render_children_into(out, *args, **kwargs)
+        return "".join(out)
+
+    def render_children_into(self, out, ctx=None):
+        self._render_nodes_into(out, self.children, ctx)
+
+    def _render_nodes_into(self, out, nodes, ctx):
+        for c in nodes:
+            if isinstance(c, Element):
+                c.render_into(out, ctx)
+            elif isinstance(c, str):
+                if c:
+                    out.append(c)
+            elif isinstance(c, Fragment):
+                out.append(c.content)
+            elif isinstance(c, types.GeneratorType):
+                self._render_nodes_into(out, _unconsumed(c), ctx)
+            else:
+                text = self.convert_to_text(c, ctx)
+                if text:
+                    out.append(text)
+
+    def iter_children(self, ctx=None):
+        return self._iter_nodes(self.children, ctx)
+
+    def _iter_nodes(self, nodes, ctx):
+        for c in nodes:
+            if isinstance(c, Element):
+                yield from c.render_iter(ctx)
+            elif isinstance(c, str):
+                if c:
+                    yield c
+            elif isinstance(c, Fragment):
+                yield c.content
+            elif isinstance(c, types.GeneratorType):
+                yield from self._iter_nodes(_unconsumed(c), ctx)
+            else:
+                text = self.convert_to_text(c, ctx)
+                if text:
+                    yield text
+
+    def get_tag_pair(self):
+        start = self._start_tag
+        if start is None:
+            attrs = self._attrib
+            if attrs.get('if') is False:
+                start = (None, None)
+            else:
+                tag = _normalize(self.tag)
+                start = (u"<%s %s>" % (tag, attrs.render()), u"</%s>" % tag)
+            if not self._exposed:
+                self._start_tag = start
+        return start
+
+    def render_into(self, out, ctx=None):
+        start, end = self.get_tag_pair()
+        if start is None:
+            return
+        out.append(start)
+        self.render_children_into(out, ctx)
+        out.append(end)
 
     def render(self, ctx=None):
-        if self.attrib.get('if') is False:
-            return None
-        attrs = self.attrib
-        content = self.render_children(ctx)
-        tag = _normalize(self.tag)
-        return u"<{tag} {attrs}>{content}</{tag}>".format(**locals())
+        out = []
+        self.render_into(out, ctx)
+        return "".join(out) if out else None
+
+    def render_iter(self, ctx=None):
+        """
+        Yield the html of this subtree fragment by fragment, depth first. Generators
+        passed as children are consumed lazily, so large trees can be streamed
+        without being held in memory. An element with generator children can only be
+        rendered once, pass lists for elements rendered more than once.
+        """
+        start, end = self.get_tag_pair()
+        if start is None:
+            return
+        yield start
+        yield from self.iter_children(ctx)
+        yield end
+
+    def write_to(self, buffer, ctx=None):
+        write = buffer.write
+        for chunk in self.render_iter(ctx):
+            write(chunk)
 
     def __str__(self):
         return self.render()
@@ -224,7 +412,28 @@ class Element(object):
         return self.render()
 
 
+@functools.lru_cache(maxsize=256)
+def static_element(tag, css_class=None):
+    """
+    Shared element with a fixed css class and its tags rendered once, for the chrome
+    of widgets. Index it to add children or call it to add attributes, its own
+    :attr:`attrib` must not be modified.
+    """
+    el = Element(tag)
+    if css_class:
+        el = el(class_=css_class)
+    el.get_tag_pair()
+    return el
+
+
 class Empty(Element):
+
+    def render_into(self, out, ctx=None):
+        self.render_children_into(out, ctx)
+
+    def render_iter(self, ctx=None):
+        return self.iter_children(ctx)
+
     def render(self, *args, **kwargs):
         return self.render_children(*args, **kwargs)
 
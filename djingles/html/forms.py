@@ -2,8 +2,9 @@
 from django.forms.boundfield import BoundField
 from django.forms.widgets import CheckboxInput
 import re
+import functools
 import jinja2
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from django.middleware import csrf
 try:
     from django.utils.encoding import force_text
@@ -16,22 +17,73 @@ from . import common, links
 __all__ = ["Choice", "form_csrf_tag", "form_attrs", "form_css_class",
            "field_choices", "field_name_range", "field_links", "iter_fields", "widget_css_class",
            "render_widget", "register_layout", "render_field", "field_css_class", "field_range",
-           "wrap_csrf_token", "is_selected_choice", "make_css_class"]
+           "wrap_csrf_token", "is_selected_choice", "make_css_class", "field_profile", "form_profile"]
 
 
 Choice = namedtuple("Choice", ["name", "value", "content", "selected"])
 
+FieldProfile = namedtuple("FieldProfile", ["css_class", "widget_css_class", "layout"])
+
+FormProfile = namedtuple("FormProfile", ["css_class", "fields"])
+
 
 _layouts = {}
 
+_css_class_re = re.compile(r'(?i)widget|field|ginger|form|input')
 
-def make_css_class(obj, suffix=""):
-    name = utils.camel_to_hyphen(re.sub(r'(?i)widget|field|ginger|form|input', '', obj.__class__.__name__, 1))
+
+@functools.lru_cache(maxsize=2048)
+def _class_css_name(cls, suffix):
+    name = utils.camel_to_hyphen(_css_class_re.sub('', cls.__name__, 1))
     if suffix:
         name = "%s%s" % (name, suffix)
     return name
 
 
+def make_css_class(obj, suffix=""):
+    return _class_css_name(obj.__class__, suffix)
+
+
+@functools.lru_cache(maxsize=2048)
+def _field_profile(field_class, widget_class):
+    if issubclass(widget_class, CheckboxInput):
+        layout = "{widget}{label_tag}{help}{errors}"
+    else:
+        layout = "{label_tag}{widget}{help}{errors}"
+    return FieldProfile(
+        _class_css_name(field_class, "-field"),
+        _class_css_name(widget_class, "-widget"),
+        layout
+    )
+
+
+def field_profile(field):
+    """
+    Css classes and default layout of a bound field. These only depend on the field
+    and widget classes and are computed once per pair. Label and help text are read
+    from the field on every render as they may be changed per instance.
+    """
+    form_field = field.field
+    return _field_profile(form_field.__class__, form_field.widget.__class__)
+
+
+@functools.lru_cache(maxsize=512)
+def _form_profile(form_class):
+    fields = OrderedDict(
+        (name, _field_profile(f.__class__, f.widget.__class__))
+        for name, f in getattr(form_class, "base_fields", {}).items()
+    )
+    return FormProfile(_class_css_name(form_class, "-form"), fields)
+
+
+def form_profile(form):
+    """
+    Render profile of a form class, built from its declared fields.
+    """
+    form_class = form if isinstance(form, type) else form.__class__
+    return _form_profile(form_class)
+
+
 def is_selected_choice(values, choice):
     if not isinstance(values, (list, tuple)):
         values = (values, )
@@ -121,18 +173,19 @@ def render_field(field, layout=None, **kwargs):
     if field.is_hidden:
         return field.as_hidden()
     layout = _layouts.get(layout, default_layout)
-    template = layout(field)
+    profile = field_profile(field)
+    template = profile.layout if layout is default_layout else layout(field)
     ctx = {
         "field": field,
         "label": field.label,
         "label_tag": common.label(class_="form-label", for_=field.id_for_label)[field.label] if field.label else "",
         "widget": render_widget(field),
         "help": field.help_text,
-        "help_tag": common.div(class_="form-help")[field.help_text],
+        "help_tag": common.static_element("div", "form-help")[field.help_text],
         "errors": field.errors
     }
     content = template.format(**ctx)
-    classes = ["form-field", field_css_class(field)]
+    classes = ["form-field", profile.css_class]
     if field.errors:
         classes.append("has-error")
     return common.div(class_=classes,
@@ -150,21 +203,19 @@ def register_layout(name, func):
 
 
 def default_layout(field):
-    if isinstance(field.field.widget, CheckboxInput):
-        return "{widget}{label_tag}{help}{errors}"
-    return "{label_tag}{widget}{help}{errors}"
+    return field_profile(field).layout
 
 
 def field_css_class(field):
-    return make_css_class(field.field, "-field")
+    return field_profile(field).css_class
 
 
 def widget_css_class(field):
-    return make_css_class(field.field.widget, "-widget")
+    return field_profile(field).widget_css_class
 
 
 def form_css_class(form):
-    return make_css_class(form, "-form")
+    return form_profile(form).css_class
 
 
 def bound_field_choices(field):
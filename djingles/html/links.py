@@ -4,11 +4,13 @@ import functools
 from collections import OrderedDict
 
 
-__all__ = ['Link', 'add_link_builder', 'build_links']
+__all__ = ['Link', 'LinkTree', 'BoundLink', 'add_link_builder', 'build_links']
 
 
 _link_builders = {}
 
+_backreference_re = re.compile(r'\\\d')
+
 
 class Link(object):
 
@@ -16,28 +18,44 @@ class Link(object):
         self.content = content
         self.icon = icon
         self.url = url
-        self.patterns = map(re.compile, kwargs.pop("patterns", []))
+        self.patterns = [re.compile(p) for p in kwargs.pop("patterns", ())]
         self.children = OrderedDict()
         self.is_active = False
         self.is_open = True
         self.attrs = attrs
+        self._parent = None
+        self._tree = None
         for k,v in kwargs.items():
             setattr(self, k, v)
 
-    def set_active(self, url, prefix_match=False):
-        initial = False
-        if not prefix_match:
-            initial = (url == self.url)
-        elif prefix_match and self.patterns:
-            initial = any(p.match(url) is not None for p in self.patterns)
-        self.is_open = self.is_active = initial
-        for n in self:
-            n.set_active(url)
-        if not self.is_open:
-            self.is_open = any(n.is_open for n in self)
-        has_active = self.is_active or any(n.is_active for n in self)
-        if not has_active and not prefix_match:
-            self.set_active(url, prefix_match=True)
+    def compile(self):
+        """
+        Return the LinkTree for the hierarchy rooted at this link. The tree is cached
+        and rebuilt only when links are added below this one.
+        """
+        tree = self._tree
+        if tree is None:
+            tree = self._tree = LinkTree(self)
+        return tree
+
+    def _invalidate(self):
+        node = self
+        while node is not None:
+            node._tree = None
+            node = node._parent
+
+    def set_active(self, url):
+        state = self.compile().resolve(url)
+        for node in self.walk():
+            node.is_active = state.is_active(node)
+            node.is_open = state.is_open(node)
+
+    def walk(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
 
     def __iter__(self):
         return iter(self.children.values())
@@ -49,7 +67,9 @@ class Link(object):
     def add(self, content, url=None, **kwargs):
         kwargs['url'] = url
         child = Link(content, **kwargs)
+        child._parent = self
         self.children[content] = child
+        self._invalidate()
         return child
 
     def __getitem__(self, item):
@@ -87,9 +107,132 @@ class Link(object):
         return attrs
 
     def build_links(self, request):
-        path_info = request.path_info
-        self.set_active(path_info)
-        return [self]
+        return [self.compile().bind(request.path_info)]
+
+
+class LinkState(object):
+
+    def __init__(self, tree, active):
+        self.active = {id(node) for node in active}
+        self.open = opened = set()
+        for node in active:
+            while node is not None and id(node) not in opened:
+                opened.add(id(node))
+                node = tree.parents[id(node)]
+
+    def is_active(self, link):
+        return id(link) in self.active
+
+    def is_open(self, link):
+        return id(link) in self.open
+
+
+class LinkTree(object):
+    """
+    Read-only index over a Link hierarchy. Links whose url equals the requested url
+    are active; when there are none, the deepest link with a matching pattern is.
+    Ancestors of active links are open. Resolution is a dict lookup plus one regex
+    match, and the per-request result lives in a LinkState rather than on the links,
+    so a tree can be built once and shared by all requests.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.parents = {}
+        self.urls = {}
+        self.matchers = []
+        self.markers = {}
+        self.pattern = None
+        stack = [(root, None, 0)]
+        candidates = []
+        while stack:
+            node, parent, depth = stack.pop()
+            self.parents[id(node)] = parent
+            if node.url is not None:
+                self.urls.setdefault(node.url, []).append(node)
+            if node.patterns:
+                candidates.append((depth, len(candidates), node))
+            stack.extend((child, node, depth + 1) for child in reversed(node.children.values()))
+        for _, _, node in sorted(candidates, key=lambda c: (-c[0], c[1])):
+            for pattern in node.patterns:
+                self.matchers.append((node, pattern))
+        self.pattern = self._combine_patterns()
+
+    def _combine_patterns(self):
+        parts = []
+        group = 0
+        markers = {}
+        for node, pattern in self.matchers:
+            if not isinstance(pattern.pattern, str) or pattern.flags & ~re.UNICODE \
+                    or _backreference_re.search(pattern.pattern):
+                return None
+            parts.append("(?:%s)()" % pattern.pattern)
+            group += pattern.groups + 1
+            markers[group] = node
+        if not parts:
+            return None
+        try:
+            combined = re.compile("|".join(parts))
+        except re.error:
+            return None
+        self.markers = markers
+        return combined
+
+    def match(self, url):
+        if self.pattern is not None:
+            match = self.pattern.match(url)
+            return self.markers[match.lastindex] if match is not None else None
+        for node, pattern in self.matchers:
+            if pattern.match(url) is not None:
+                return node
+
+    def resolve(self, url):
+        active = self.urls.get(url)
+        if not active:
+            node = self.match(url)
+            active = [node] if node is not None else []
+        return LinkState(self, active)
+
+    def bind(self, url):
+        return BoundLink(self.root, self.resolve(url))
+
+
+class BoundLink(object):
+    """
+    A Link paired with the LinkState of the current request.
+    """
+
+    def __init__(self, link, state):
+        self.link = link
+        self.state = state
+
+    @property
+    def is_active(self):
+        return self.state.is_active(self.link)
+
+    @property
+    def is_open(self):
+        return self.state.is_open(self.link)
+
+    def __getattr__(self, item):
+        return getattr(self.link, item)
+
+    def __iter__(self):
+        for child in self.link:
+            yield BoundLink(child, self.state)
+
+    def __getitem__(self, item):
+        return BoundLink(self.link[item], self.state)
+
+    def __contains__(self, item):
+        return item in self.link
+
+    def __len__(self):
+        return len(self.link)
+
+    render_children = Link.render_children
+
+    render = Link.render
 
 
 def add_link_builder(cls, build_func):
@@ -101,12 +244,15 @@ def get_link_builder(obj):
     if hasattr(obj, 'build_links'):
         return obj.build_links
     else:
-        try:
-            func = _link_builders[cls]
-        except KeyError:
+        func = _link_builders.get(cls)
+        if func is None:
+            # builders registered by the apps' jinja2globals modules
+            from djingles.jinja2 import load_library
+            load_library()
+            func = _link_builders.get(cls)
+        if func is None:
             raise TypeError("No link builder associated with %r"%cls)
-        else:
-            return functools.partial(func, obj)
+        return functools.partial(func, obj)
 
 
 def build_links(obj, request, *args, **kwargs):
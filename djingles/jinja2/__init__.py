@@ -1,56 +1,268 @@
 
 
+import functools
+import os
+import uuid
+from importlib import import_module
+from django.conf import settings
 from django.contrib.staticfiles.storage import staticfiles_storage
-from django.urls import reverse
-from jinja2 import Environment
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import reverse, get_script_prefix, get_urlconf
+from django.utils.translation import get_language
+from jinja2 import Environment, FileSystemBytecodeCache, ChoiceLoader, ModuleLoader, TemplateSyntaxError
 
+from djingles import utils
 from .library import jinja2_filter, jinja2_function, library, Jinja2Function
 from . import extensions
 
 
-__all__ = ['jinja2_filter', 'jinja2_function', 'environment', 'Jinja2Function']
+__all__ = ['jinja2_filter', 'jinja2_function', 'environment', 'Jinja2Function',
+           'get_environments', 'compile_templates']
+
+
+class LazyFilters(dict):
+    """
+    Filter mapping that falls back to django's template filter libraries. The
+    libraries are imported the first time a filter is not found, and each filter is
+    copied in on first use.
+    """
+
+    libraries = ("django.template.defaultfilters", "django.contrib.humanize.templatetags.humanize")
+
+    def __init__(self, *args, **kwargs):
+        super(LazyFilters, self).__init__(*args, **kwargs)
+        self._fallback = None
+
+    def _get_fallback(self):
+        if self._fallback is None:
+            fallback = {}
+            for name in reversed(self.libraries):
+                fallback.update(import_module(name).register.filters)
+            self._fallback = fallback
+        return self._fallback
+
+    def __missing__(self, key):
+        func = self._get_fallback()[key]
+        self[key] = func
+        return func
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._get_fallback()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
 
 def inject_filters(env):
-    from django.contrib.humanize.templatetags import humanize
-    from django.template.defaultfilters import register
+    if not isinstance(env.filters, LazyFilters):
+        env.filters = LazyFilters(env.filters)
 
-    for name, func in register.filters.items():
-        if name not in env.filters:
-            env.filters[name] = func
 
-    for name, func in humanize.register.filters.items():
-        if name not in env.filters:
-            env.filters[name] = func
+@functools.lru_cache(maxsize=None)
+def load_library():
+    """
+    Import the modules registering library functions and filters: djingles' own and
+    the ``jinja2globals`` module of every installed app. Runs once, when the first
+    environment is created or when a link builder is first looked up.
+    """
+    from . import filters, functions
+    for module in utils.iter_app_modules("jinja2globals"):
+        pass
 
 
 def inject_functions(env):
     pass
 
 
-def inject_library(env):
+def inject_library(env, profile=False):
+    if profile:
+        from .profiling import instrument
     for key, func in library.functions.items():
-        env.globals[key] = func
+        env.globals[key] = instrument(key, func) if profile else func
 
     for key, func in library.filters.items():
-        env.filters[key] = func
+        env.filters[key] = instrument("|%s" % key, func) if profile else func
+
+
+_CACHEABLE_URL_ARGS = (str, int, uuid.UUID)
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_reverse(view_name, kwargs, urlconf, script_prefix, language):
+    return reverse(view_name, kwargs=dict(kwargs), urlconf=urlconf)
 
 
 def jinja2_reverse(view_name, **kwargs):
+    """
+    ``reverse`` for templates. Results are memoised per urlconf, script prefix and
+    language as long as all the arguments are strings, numbers or uuids; anything
+    else (model instances, lazy objects) is reversed on every call.
+    """
     extra = kwargs.pop("kwargs", {})
     kwargs.update(extra)
-    return reverse(view_name, kwargs=kwargs)
+    if not all(isinstance(value, _CACHEABLE_URL_ARGS) for value in kwargs.values()):
+        return reverse(view_name, kwargs=kwargs)
+    try:
+        return _cached_reverse(view_name, tuple(sorted(kwargs.items())),
+                               get_urlconf(), get_script_prefix(), get_language())
+    except TypeError:
+        return reverse(view_name, kwargs=kwargs)
+
+
+_static_manifest = None
+
+
+@functools.lru_cache(maxsize=2048)
+def _cached_static(path):
+    return staticfiles_storage.url(path)
+
+
+def jinja2_static(path):
+    """
+    ``staticfiles_storage.url`` memoised by path. The cache is dropped whenever the
+    storage's manifest (``hashed_files``) is replaced, e.g. after collectstatic.
+    """
+    global _static_manifest
+    manifest = getattr(staticfiles_storage, "hashed_files", None)
+    if manifest is not _static_manifest:
+        _cached_static.cache_clear()
+        _static_manifest = manifest
+    return _cached_static(path)
+
+
+def clear_url_caches():
+    _cached_reverse.cache_clear()
+    _cached_static.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_url_caches(setting, **kwargs):
+    if setting in ("ROOT_URLCONF", "FORCE_SCRIPT_NAME", "LANGUAGES", "STATIC_URL",
+                   "STORAGES", "STATICFILES_STORAGE", "DEBUG"):
+        clear_url_caches()
+
+
+def environment_signature(env):
+    """
+    Hash of the environment settings that change the compiled code of a template.
+    Used to keep bytecode of differently configured environments apart.
+    """
+    autoescape = env.autoescape
+    if callable(autoescape):
+        autoescape = utils.qualified_name(autoescape)
+    return utils.create_hash(
+        sorted(env.extensions), autoescape, env.is_async, env.optimized,
+        env.block_start_string, env.block_end_string, env.variable_start_string,
+        env.variable_end_string, env.comment_start_string, env.comment_end_string,
+        env.line_statement_prefix, env.line_comment_prefix, env.trim_blocks,
+        env.lstrip_blocks, env.newline_sequence, env.keep_trailing_newline
+    )
+
+
+def create_bytecode_cache(env, directory):
+    os.makedirs(directory, exist_ok=True)
+    pattern = "__djingles_%s_%%s.cache" % environment_signature(env)[:12]
+    return FileSystemBytecodeCache(directory, pattern)
 
 
 def environment(**options):
+    """
+    Besides the regular jinja2 options this accepts:
+
+    - ``bytecode_cache_dir``: directory shared by all workers for compiled template
+      bytecode. Defaults to ``settings.JINJA2_BYTECODE_CACHE_DIR``.
+    - ``compiled_templates_dir``: directory written by ``manage.py compile_templates
+      --target``; templates found there are loaded with a ModuleLoader and are not
+      reloaded when their sources change. Defaults to ``settings.JINJA2_COMPILED_TEMPLATES_DIR``.
+    - ``strip_whitespace``: collapse whitespace in template sources at compile time.
+      Defaults to ``settings.JINJA2_STRIP_WHITESPACE``.
+    - ``profile``: time every library function and filter, see
+      ``djingles.jinja2.profiling``. Defaults to ``settings.JINJA2_PROFILE``.
+
+    ``enable_async`` defaults to ``settings.JINJA2_ENABLE_ASYNC``. Async environments
+    await coroutine library functions and iterate querysets with ``async for``; render
+    them with ``AsyncTemplateResponse`` under ASGI.
+    """
+    bytecode_cache_dir = options.pop("bytecode_cache_dir", getattr(settings, "JINJA2_BYTECODE_CACHE_DIR", None))
+    compiled_templates_dir = options.pop("compiled_templates_dir",
+                                         getattr(settings, "JINJA2_COMPILED_TEMPLATES_DIR", None))
+    if compiled_templates_dir and options.get("loader") is not None:
+        options["loader"] = ChoiceLoader([ModuleLoader(compiled_templates_dir), options["loader"]])
+    options.setdefault("enable_async", getattr(settings, "JINJA2_ENABLE_ASYNC", False))
+    strip_whitespace = options.pop("strip_whitespace", getattr(settings, "JINJA2_STRIP_WHITESPACE", False))
+    profile = options.pop("profile", getattr(settings, "JINJA2_PROFILE", False))
+    load_library()
     options['extensions'] = library.extensions + [extensions.PreExtension, extensions.TableExtension]
+    if strip_whitespace:
+        options['extensions'].append(extensions.WhitespaceExtension)
     env = Environment(**options)
+    if bytecode_cache_dir and env.bytecode_cache is None:
+        env.bytecode_cache = create_bytecode_cache(env, bytecode_cache_dir)
     env.globals.update({
-        'static': staticfiles_storage.url,
+        'static': jinja2_static,
         'url': jinja2_reverse,
     })
     inject_filters(env)
     inject_functions(env)
-    inject_library(env)
+    inject_library(env, profile=profile)
     return env
 
+
+
+def get_environments():
+    """
+    Jinja2 environments of all the Jinja2 template engines configured in django.
+    """
+    from django.template import engines
+    from django.template.backends.jinja2 import Jinja2
+    return [engine.env for engine in engines.all() if isinstance(engine, Jinja2)]
+
+
+def _source_loader(loader):
+    if isinstance(loader, ChoiceLoader):
+        loaders = [_source_loader(l) for l in loader.loaders if not isinstance(l, ModuleLoader)]
+        return ChoiceLoader(loaders)
+    return loader
+
+
+def is_template_name(name):
+    """
+    Whether ``name`` listed by a loader is a template. App ``jinja2`` directories may
+    be python packages too, their sources and bytecode are skipped. With
+    ``settings.JINJA2_TEMPLATE_EXTENSIONS`` only names with one of those extensions
+    are templates.
+    """
+    extensions = getattr(settings, "JINJA2_TEMPLATE_EXTENSIONS", None)
+    if extensions:
+        return os.path.splitext(name)[1].lstrip(".") in extensions
+    return "__pycache__" not in name.split("/") and not name.endswith((".py", ".pyc"))
+
+
+def compile_templates(env, target=None, log_function=None):
+    """
+    Compile every template the environment can list. With a ``target`` directory the
+    compiled modules are written there for use with a ModuleLoader, otherwise the
+    templates are loaded once so that their bytecode lands in the bytecode cache.
+    Returns the number of templates compiled.
+    """
+    if log_function is None:
+        log_function = lambda msg: None
+    loader = _source_loader(env.loader)
+    names = [name for name in loader.list_templates() if is_template_name(name)]
+    if target is not None:
+        compiler = env.overlay(loader=loader, bytecode_cache=None)
+        compiler.compile_templates(target, filter_func=is_template_name, zip=None, log_function=log_function)
+        return len(names)
+    count = 0
+    for name in names:
+        try:
+            env.get_template(name)
+        except (TemplateSyntaxError, UnicodeDecodeError) as ex:
+            log_function('Could not compile "%s": %s' % (name, ex))
+        else:
+            count += 1
+    return count
@@ -1,14 +1,63 @@
-
+import re
+import time
+import inspect
+import functools
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+from jinja2 import nodes
 from jinja2.nodes import CallBlock
 from jinja2.ext import Extension
-from djingles import html
+from jinja2.lexer import Token
+from jinja2.utils import markupsafe
+from djingles import html, utils
+from .library import Jinja2Extension
+
+
+def constant_body(body):
+    """
+    Return the text of a parsed block body made only of template data, or None when
+    the body has any expressions or statements.
+    """
+    parts = []
+    for node in body:
+        if not isinstance(node, nodes.Output):
+            return None
+        for child in node.nodes:
+            if not isinstance(child, nodes.TemplateData):
+                return None
+            parts.append(child.data)
+    return "".join(parts)
+
+
+def with_caller_output(caller, func, *args):
+    """
+    Pass the rendered body of a call block to ``func``. In async environments the
+    caller returns an awaitable, and so does this function.
+    """
+    output = caller()
+    if inspect.isawaitable(output):
+        async def process():
+            return func(str(await output), *args)
+        return process()
+    return func(str(output), *args)
+
 
 class PreExtension(Extension):
     tags = set(['pre'])
 
+    cache_size = 128
+
+    def __init__(self, environment):
+        super(PreExtension, self).__init__(environment)
+        self._format_cached = functools.lru_cache(maxsize=self.cache_size)(self._format_whitespace)
+
     def parse(self, parser):
         lineno = next(parser.stream).lineno
         body = parser.parse_statements(['name:endpre'], drop_needle=True)
+        text = constant_body(body)
+        if text is not None:
+            return nodes.Output([nodes.TemplateData(self._format_whitespace(text))]).set_lineno(lineno)
         return CallBlock(
             self.call_method('_format_content'),
             [],
@@ -17,9 +66,7 @@ class PreExtension(Extension):
         ).set_lineno(lineno)
 
     def _format_content(self, caller):
-        block = caller()
-        block = self._format_whitespace(block)
-        return block
+        return with_caller_output(caller, self._format_cached)
 
     def _format_whitespace(self, block):
         blocks = []
@@ -48,24 +95,40 @@ class PreExtension(Extension):
 class TableExtension(Extension):
     tags = set(("table",))
 
+    delimiter = "||"
+
+    cache_size = 128
+
+    def __init__(self, environment):
+        super(TableExtension, self).__init__(environment)
+        self._format_cached = functools.lru_cache(maxsize=self.cache_size)(self._format_whitespace)
+
     def parse(self, parser):
         lineno = next(parser.stream).lineno
         body = parser.parse_statements(['name:endtable'], drop_needle=True)
+        text = constant_body(body)
+        if text is not None:
+            content = self._format_whitespace(text, self.delimiter)
+            return nodes.Output([nodes.TemplateData(content)]).set_lineno(lineno)
         return CallBlock(self.call_method('_process_table'),
                                [], [], body).set_lineno(lineno)
 
     def _process_table(self, caller):
-        block = caller()
-        delimiter = "||"
-        block = self._format_whitespace(block, delimiter)
-        return block
+        return with_caller_output(caller, self._format_cached, self.delimiter)
 
     def _format_row(self, row, delimiter):
         columns = row.split(delimiter)
         return html.tr[[html.td(valign='top')[a] for a in columns]]
 
     def _format_whitespace(self, block, delimiter):
-        blocks = []
+        root = html.table(style="width:100%")[
+            html.tbody[
+                self._iter_rows(block, delimiter)
+            ]
+        ]
+        return "".join(root.render_iter())
+
+    def _iter_rows(self, block, delimiter):
         current = []
         empty = 0
         for ln in block.strip().splitlines():
@@ -75,19 +138,140 @@ class TableExtension(Extension):
             else:
                 empty = 0
             if not ln and current:
-                content = self._format_row("<br>".join(current), delimiter)
+                yield self._format_row("<br>".join(current), delimiter)
                 current = []
-                blocks.append(content)
             elif ln:
                 current.append(ln)
             elif empty <= 2:
-                blocks.append("<br>")
+                yield "<br>"
         if current:
-            content = self._format_row("<br>".join(current), delimiter)
-            blocks.append(content)
-        root = html.table(style="width:100%")[
-            html.tbody[
-                blocks
-            ]
-        ]
-        return str(root)
\ No newline at end of file
+            yield self._format_row("<br>".join(current), delimiter)
+
+
+class FragmentCacheExtension(Jinja2Extension):
+    """
+    Caches the rendered body of a block in django's cache::
+
+        {% cache "sidebar", 3600, request.user.pk, request.GET.urlencode() %}
+            ...
+        {% endcache %}
+
+    The first argument names the fragment, the optional second one is the timeout
+    in seconds and any further arguments are values the fragment varies on. The
+    active language is always part of the key. The cache alias is taken from
+    ``settings.JINJA2_FRAGMENT_CACHE``.
+
+    Entries outlive their timeout by ``grace_period`` seconds. Once an entry is
+    stale, one renderer takes a short lock and refreshes it while others keep
+    serving the stale copy.
+    """
+    tags = {"cache"}
+
+    default_timeout = 300
+    grace_period = 60
+    lock_timeout = 30
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        name = args[0]
+        timeout = args[1] if len(args) > 1 else nodes.Const(None)
+        vary_on = nodes.List(args[2:])
+        return CallBlock(self.call_method('_cache_fragment', [name, timeout, vary_on]),
+                         [], [], body).set_lineno(lineno)
+
+    def get_cache(self):
+        return caches[getattr(settings, "JINJA2_FRAGMENT_CACHE", "default")]
+
+    def make_key(self, name, vary_on):
+        return "djingles:fragment:%s" % utils.create_hash(name, vary_on, translation.get_language())
+
+    def _cache_fragment(self, name, timeout, vary_on, caller):
+        if timeout is None:
+            timeout = getattr(settings, "JINJA2_FRAGMENT_CACHE_TIMEOUT", self.default_timeout)
+        cache = self.get_cache()
+        key = self.make_key(name, vary_on)
+        entry = cache.get(key)
+        if entry is not None:
+            expires, content = entry
+            if expires > time.time() or not cache.add("%s:lock" % key, 1, self.lock_timeout):
+                return markupsafe.Markup(content)
+        return with_caller_output(caller, self._store_fragment, cache, key, timeout, entry is not None)
+
+    def _store_fragment(self, content, cache, key, timeout, locked):
+        cache.set(key, (time.time() + timeout, content), timeout + self.grace_period)
+        if locked:
+            cache.delete("%s:lock" % key)
+        return markupsafe.Markup(content)
+
+
+class WhitespaceExtension(Extension):
+    """
+    Collapses whitespace in the static parts of templates while they are compiled.
+    Runs of whitespace, also between tags, become a single space, which keeps the
+    gaps between inline elements. The content of pre, textarea, script and style
+    elements, of ``{% raw %}`` and of the ``{% pre %}`` and ``{% table %}`` blocks is
+    left untouched.
+    """
+
+    preserved_elements = ("pre", "textarea", "script", "style")
+    preserved_blocks = ("pre", "table")
+
+    _space_re = re.compile(r'\s+')
+    _newline_re = re.compile(r'\r\n|\r|\n')
+
+    def __init__(self, environment):
+        super(WhitespaceExtension, self).__init__(environment)
+        self._raw_data = {}
+
+    def preprocess(self, source, name, filename=None):
+        # raw_begin and raw_end are dropped from the token stream, so remember the
+        # data tokens of raw blocks to leave them alone in filter_stream
+        raw = set()
+        inside = False
+        for lineno, token, value in self.environment.lexer.tokeniter(source, name, filename):
+            if token == "raw_begin":
+                inside = True
+            elif token == "raw_end":
+                inside = False
+            elif inside and token == "data":
+                raw.add((lineno, self._newline_re.sub(self.environment.newline_sequence, value)))
+        self._raw_data[(name, filename)] = raw
+        return source
+
+    def filter_stream(self, stream):
+        raw = self._raw_data.pop((stream.name, stream.filename), ())
+        element_re = re.compile(r'<(/?)(%s)\b[^>]*>' % "|".join(self.preserved_elements), re.I)
+        element = None
+        block = 0
+        previous = None
+        for token in stream:
+            if token.type == "name" and previous is not None and previous.type == "block_begin":
+                if token.value in self.preserved_blocks:
+                    block += 1
+                elif token.value.startswith("end") and token.value[3:] in self.preserved_blocks:
+                    block -= 1
+            elif token.type == "data" and not block and (token.lineno, token.value) not in raw:
+                parts = []
+                position = 0
+                for match in element_re.finditer(token.value):
+                    closing, name = match.group(1), match.group(2).lower()
+                    if element is None and not closing:
+                        parts.append(self.collapse(token.value[position:match.start()]))
+                        position = match.start()
+                        element = name
+                    elif element == name and closing:
+                        parts.append(token.value[position:match.end()])
+                        position = match.end()
+                        element = None
+                rest = token.value[position:]
+                parts.append(rest if element is not None else self.collapse(rest))
+                token = Token(token.lineno, token.type, "".join(parts))
+            previous = token
+            yield token
+
+    def collapse(self, text):
+        return self._space_re.sub(" ", text)
@@ -1,7 +1,12 @@
 
 import functools
+import inspect
 import jinja2
-from django.template.loader import render_to_string
+from asgiref.sync import sync_to_async
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.backends.jinja2 import Jinja2
+from django.template.loader import select_template
 from jinja2.ext import Extension
 from jinja2.utils import markupsafe
 
@@ -19,6 +24,67 @@ class _Library:
 library = _Library()
 
 
+_template_cache = {}
+
+
+def get_template(template_names):
+    """
+    Resolve a template name or a list of names once and keep the template. Jinja2
+    templates are unwrapped from django's backend template so they render without
+    going through it. Templates of other backends keep their backend wrapper, which
+    renders a plain dict. Jinja2 templates are looked up again when auto reload is
+    on and their source has changed.
+    """
+    key = (template_names, ) if isinstance(template_names, str) else tuple(template_names)
+    template = _template_cache.get(key)
+    if template is None or not _is_up_to_date(template):
+        template = select_template(list(key))
+        if isinstance(getattr(template, "backend", None), Jinja2):
+            template = template.template
+        _template_cache[key] = template
+    return template
+
+
+def _is_up_to_date(template):
+    env = getattr(template, "environment", None)
+    if env is None or not env.auto_reload:
+        return True
+    return template.is_up_to_date
+
+
+async def render_template_async(template, context):
+    """
+    Render a template returned by get_template from async code. Templates of an async
+    jinja2 environment are rendered on the event loop, others in a worker thread.
+    """
+    env = getattr(template, "environment", None)
+    if env is not None and env.is_async:
+        return await template.render_async(context)
+    return await sync_to_async(template.render)(context)
+
+
+async def _render_markup_async(template, context):
+    return markupsafe.Markup(await render_template_async(template, context))
+
+
+def render_template(template, context):
+    """
+    Render a template returned by get_template as markup. Templates of an async
+    jinja2 environment can only be rendered from its event loop, for those an
+    awaitable is returned, which jinja2 awaits when the result is output.
+    """
+    env = getattr(template, "environment", None)
+    if env is not None and env.is_async:
+        return _render_markup_async(template, context)
+    return markupsafe.Markup(template.render(context))
+
+
+@receiver(setting_changed)
+def clear_template_cache(**kwargs):
+    if kwargs.get("setting", "TEMPLATES") == "TEMPLATES":
+        _template_cache.clear()
+
+
 def jinja2_filter(name=None):
     def closure(func):
         nonlocal name
@@ -30,19 +96,31 @@ def jinja2_filter(name=None):
 
 
 def jinja2_function(template=None, name=None, takes_context=False, mark_safe=False):
+    """
+    Register a function as a jinja2 global. Coroutine functions get coroutine wrappers
+    and are awaited by environments created with ``enable_async``.
+    """
     def closure(orig_func):
         func = orig_func
         wrapper = None
         name_ = name or getattr(func,'_decorated_function', func).__name__
+        is_async = inspect.iscoroutinefunction(orig_func)
 
-        if template:
+        if template and is_async:
+            async def wrapper(*args, **kwargs):
+                t = get_template(template)
+                ctx = await orig_func(*args, **kwargs)
+                result = await render_template_async(t, ctx)
+                return markupsafe.Markup(result)
+        elif template:
             def wrapper(*args, **kwargs):
-                from django.template.loader import get_template
                 t = get_template(template)
                 ctx = orig_func(*args, **kwargs)
-                result = t.render(ctx)
-                result = markupsafe.Markup(result)
-                return result
+                return render_template(t, ctx)
+        elif mark_safe and is_async:
+            async def wrapper(*args, **kwargs):
+                result = await orig_func(*args, **kwargs)
+                return markupsafe.Markup(result)
         elif mark_safe:
             def wrapper(*args, **kwargs):
                 result = orig_func(*args, **kwargs)
@@ -81,12 +159,26 @@ class Jinja2Function(metaclass=MetaJinja2Function):
     def render(self):
         ctx = self.get_context_data()
         ctx['me'] = self
-        template_names = self.get_template_names()
-        content = render_to_string(template_names, ctx)
+        template = get_template(self.get_template_names())
+        return render_template(template, ctx)
+
+    async def render_async(self):
+        ctx = self.get_context_data()
+        if inspect.isawaitable(ctx):
+            ctx = await ctx
+        ctx['me'] = self
+        template = get_template(self.get_template_names())
+        content = await render_template_async(template, ctx)
         return markupsafe.Markup(content)
 
     @classmethod
     def as_function(cls):
+        if inspect.iscoroutinefunction(cls.get_context_data):
+            async def func(*args, **kwargs):
+                instance = cls(*args, **kwargs)
+                return await instance.render_async()
+            return func
+
         def func(*args, **kwargs):
             instance = cls(*args, **kwargs)
             return instance.render()
@@ -0,0 +1,153 @@
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+import types
+
+from django.http import JsonResponse
+from django.core.exceptions import PermissionDenied
+
+
+__all__ = ['profiler', 'instrument', 'ProfilingMiddleware', 'profile_view']
+
+
+logger = logging.getLogger("djingles.jinja2.profiling")
+
+_request_stats = contextvars.ContextVar("djingles_jinja2_request_stats", default=None)
+
+
+class RenderProfiler(object):
+    """
+    Call counts and time spent in instrumented template functions, for the whole
+    process and for the current request.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, name, elapsed):
+        with self.lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                entry = self.stats[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+        request_stats = _request_stats.get()
+        if request_stats is not None:
+            entry = request_stats.get(name)
+            if entry is None:
+                entry = request_stats[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def snapshot(self):
+        with self.lock:
+            return _summarize(self.stats)
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def start_request(self):
+        return _request_stats.set({})
+
+    def finish_request(self, token):
+        stats = _request_stats.get()
+        _request_stats.reset(token)
+        return _summarize(stats or {})
+
+
+def _summarize(stats):
+    result = [
+        {"name": name, "calls": calls, "total": total, "average": total / calls}
+        for name, (calls, total) in stats.items()
+    ]
+    result.sort(key=lambda r: r["total"], reverse=True)
+    return result
+
+
+profiler = RenderProfiler()
+
+
+def instrument(name, func):
+    """
+    Wrap a template function or filter so that each call is timed under ``name``.
+    When the call returns a generator, the time spent iterating it is added to the
+    call. Attributes such as jinja2's ``pass_context`` marker are carried over.
+    """
+    record = profiler.record
+    clock = time.perf_counter
+
+    if inspect.iscoroutinefunction(func):
+        async def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+    else:
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(name, clock() - start)
+                raise
+            elapsed = clock() - start
+            if isinstance(result, types.GeneratorType):
+                return _timed_iteration(name, result, elapsed)
+            record(name, elapsed)
+            return result
+    return functools.update_wrapper(wrapper, func)
+
+
+def _timed_iteration(name, generator, elapsed):
+    clock = time.perf_counter
+    try:
+        while True:
+            start = clock()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += clock() - start
+            yield item
+    finally:
+        profiler.record(name, elapsed)
+
+
+class ProfilingMiddleware(object):
+    """
+    Collects the template function timings of each request and logs them at debug
+    level on the ``djingles.jinja2.profiling`` logger.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = profiler.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = profiler.finish_request(token)
+        if stats:
+            logger.debug("Template functions for %s", request.path, extra={"template_functions": stats})
+        return response
+
+
+def profile_view(request):
+    """
+    Staff only view returning the process wide timings as json. Pass ``reset=1`` to
+    clear them after reading.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    stats = profiler.snapshot()
+    if request.GET.get("reset"):
+        profiler.reset()
+    return JsonResponse({"functions": stats})
@@ -0,0 +1,72 @@
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.template import loader
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.template.response import TemplateResponse
+
+
+__all__ = ['generate_template', 'StreamingTemplateResponse', 'AsyncTemplateResponse']
+
+
+def jinja2_context(template, context=None, request=None):
+    """
+    Build the context django's jinja2 backend would pass to ``template``.
+    """
+    context = dict(context or {})
+    if request is not None:
+        context["request"] = request
+        context["csrf_input"] = csrf_input_lazy(request)
+        context["csrf_token"] = csrf_token_lazy(request)
+        for processor in template.backend.template_context_processors:
+            context.update(processor(request))
+    return context
+
+
+def generate_template(template_name, context=None, request=None, using=None):
+    """
+    Render a template as an iterator of strings. Jinja2 templates are rendered through
+    ``Template.generate`` so output is produced while the template is evaluated, other
+    templates are rendered in one go.
+    """
+    if isinstance(template_name, (list, tuple)):
+        template = loader.select_template(template_name, using=using)
+    else:
+        template = loader.get_template(template_name, using=using)
+    jinja_template = getattr(template, "template", None)
+    if not hasattr(jinja_template, "generate"):
+        return iter([template.render(context, request)])
+    return jinja_template.generate(jinja2_context(template, context, request))
+
+
+class StreamingTemplateResponse(StreamingHttpResponse):
+
+    def __init__(self, request, template, context=None, using=None, **kwargs):
+        kwargs.setdefault("content_type", "text/html; charset=utf-8")
+        content = generate_template(template, context, request=request, using=using)
+        super(StreamingTemplateResponse, self).__init__(content, **kwargs)
+
+
+class AsyncTemplateResponse(TemplateResponse):
+    """
+    TemplateResponse whose ``render`` is a coroutine. Templates of an async jinja2
+    environment are rendered with ``render_async`` on the event loop, other templates
+    in a worker thread. Only usable with django's async (ASGI) request handler.
+    """
+
+    async def render(self):
+        retval = self
+        if not self._is_rendered:
+            self.content = await self.rendered_content_async()
+            for post_callback in self._post_render_callbacks:
+                newretval = post_callback(retval)
+                if newretval is not None:
+                    retval = newretval
+        return retval
+
+    async def rendered_content_async(self):
+        template = self.resolve_template(self.template_name)
+        context = self.resolve_context(self.context_data)
+        jinja_template = getattr(template, "template", None)
+        if jinja_template is None or not jinja_template.environment.is_async:
+            return await sync_to_async(template.render)(context, self._request)
+        return await jinja_template.render_async(jinja2_context(template, context, self._request))
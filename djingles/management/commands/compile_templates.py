@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand, CommandError
+from djingles.jinja2 import get_environments, compile_templates
+
+
+class Command(BaseCommand):
+
+    help = 'Compile all jinja2 templates into the bytecode cache or into a directory of python modules'
+
+    def add_arguments(self, parser):
+        parser.add_argument("-t", "--target", default=None,
+                            help="Directory to write compiled template modules to, for use with a ModuleLoader")
+
+    def handle(self, **options):
+        target = options["target"]
+        verbose = int(options["verbosity"]) > 1
+        log = self.verbose if verbose else None
+        environments = get_environments()
+        if not environments:
+            raise CommandError("No jinja2 template engine is configured")
+        for env in environments:
+            if target is None and env.bytecode_cache is None:
+                raise CommandError("No bytecode cache is configured, set JINJA2_BYTECODE_CACHE_DIR "
+                                   "or pass --target")
+            count = compile_templates(env, target=target, log_function=log)
+            self.stdout.write("Compiled %d templates\n" % count)
+
+    def verbose(self, message):
+        self.stdout.write(message)
+        self.stdout.write("\n")
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+from djingles.warmup import warmup
+
+
+class Command(BaseCommand):
+
+    help = 'Build the url resolver, viewset formatter and form classes and compiled templates, ' \
+           'and report the time each took'
+
+    def handle(self, **options):
+        verbose = int(options["verbosity"]) > 1
+        log = self.verbose if verbose else None
+        timings = warmup(log_function=log)
+        for name, elapsed in timings.items():
+            self.stdout.write("%-10s %8.1fms\n" % (name, elapsed * 1000))
+        self.stdout.write("%-10s %8.1fms\n" % ("total", sum(timings.values()) * 1000))
+
+    def verbose(self, message):
+        self.stdout.write(message)
+        self.stdout.write("\n")
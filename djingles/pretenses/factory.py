@@ -1,7 +1,6 @@
 
 from django.core.exceptions import ValidationError
 import contextlib
-import pytz.exceptions as pyex
 import random
 import importlib
 from django.conf import settings
@@ -16,6 +15,16 @@ from . import utils, streams
 __all__ = ['register', 'generate']
 
 
+CREATE_ERRORS = (IntegrityError, ValidationError)
+
+try:
+    import pytz.exceptions as pyex
+except ImportError:
+    pass
+else:
+    CREATE_ERRORS += (pyex.AmbiguousTimeError, pyex.NonExistentTimeError, pyex.InvalidTimeError)
+
+
 _processors = {}
 _callback = None
 
@@ -251,12 +260,7 @@ class Factory(object):
             try:
                 ins = self.create(self.highest_id+i, limit, **kwargs)
                 i += 1
-            except (IntegrityError,
-                        ValidationError,
-                        pyex.AmbiguousTimeError,
-                        pyex.NonExistentTimeError,
-                        pyex.InvalidTimeError
-                    ) as ex:
+            except CREATE_ERRORS as ex:
                 errors += 1
                 if errors > limit * 5:
                     raise
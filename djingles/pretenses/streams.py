@@ -1,7 +1,6 @@
 
 from decimal import Decimal
 from datetime import datetime, timedelta, date, time
-from django.contrib.gis.geos.point import Point
 import random
 import string
 
@@ -307,6 +306,7 @@ class PointStream(object):
         self.radius = radius
 
     def next(self, field):
+        from django.contrib.gis.geos.point import Point
         from geopy.distance import VincentyDistance
         longitude = random.randint(-179, 179) if self.longitude is None else self.longitude
         latitude = random.randint(-179, 179) if self.latitude is None else self.latitude
@@ -1,8 +1,8 @@
 
 import random
 import os
+from functools import lru_cache
 from os import path
-from django.utils.lru_cache import lru_cache
 
 
 __all__ = ['get_random_file', 'get_random_image', 'get_cached_files']
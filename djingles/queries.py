@@ -0,0 +1,176 @@
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+__all__ = ['QueryCounter', 'QueryBudgetExceeded', 'check_query_budget', 'replay_viewsets']
+
+
+logger = logging.getLogger("djingles.queries")
+
+_in_list_re = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_number_re = re.compile(r"\b\d+\b")
+_string_re = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint(sql):
+    """
+    ``sql`` with literals and the length of IN lists taken out, so that the queries
+    of an N+1 loop share one fingerprint.
+    """
+    sql = _string_re.sub("?", sql)
+    sql = _number_re.sub("?", sql)
+    return _in_list_re.sub("(...)", sql)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_active_counter = contextvars.ContextVar("djingles_query_counter", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _active_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        alias = context["connection"].alias
+        while counter is not None:
+            counter.record(alias, sql, elapsed)
+            counter = counter.parent
+
+
+def _install(connection):
+    # first in the list: django's execute_wrapper() blocks pop the last wrapper on
+    # exit, which must stay theirs. The first wrapper is also the innermost one.
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+class QueryCounter(object):
+    """
+    Counts the queries run while used as a context manager, and the time they take.
+    The counter follows the context, so queries run through ``sync_to_async`` count
+    too. Counters nest.
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.count = 0
+        self.time = 0.0
+        self.fingerprints = Counter()
+        self.parent = None
+        self._token = None
+
+    def record(self, alias, sql, elapsed):
+        if self.using is not None and alias not in self.using:
+            return
+        self.count += 1
+        self.time += elapsed
+        self.fingerprints[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        self.parent = _active_counter.get()
+        self._token = _active_counter.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_counter.reset(self._token)
+        self._token = None
+
+    def repeated(self, limit):
+        """
+        Fingerprints executed at least ``limit`` times, most frequent first.
+        """
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= limit]
+
+    def as_dict(self, repeat_limit=None):
+        result = {"count": self.count, "time": self.time}
+        if repeat_limit:
+            result["repeated"] = self.repeated(repeat_limit)
+        return result
+
+
+def check_query_budget(counter, label, budget=None, repeat_limit=None, fail=False):
+    """
+    Log, or raise ``QueryBudgetExceeded`` with ``fail``, when ``counter`` ran more
+    than ``budget`` queries or repeated one query ``repeat_limit`` times.
+    """
+    problems = []
+    if budget is not None and counter.count > budget:
+        problems.append("%d queries, budget is %d" % (counter.count, budget))
+    if repeat_limit:
+        for sql, n in counter.repeated(repeat_limit):
+            problems.append("%d x %s" % (n, sql))
+    if not problems:
+        return
+    message = "%s: %s" % (label, "; ".join(problems))
+    if fail:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message, extra={"queries": counter.as_dict(repeat_limit)})
+
+
+def replay_viewsets(client=None, async_client=None, total=5, repeat_limit=5):
+    """
+    Request every GET action of the routed viewsets once, after generating ``total``
+    instances of each viewset's model with pretenses, and return a report of the
+    queries each one ran. Meant for tests; pass logged in clients for views that
+    need a user. Async viewsets are requested through ``async_client``.
+    """
+    from asgiref.sync import async_to_sync
+    from django.test import AsyncClient, Client
+    from django.urls import reverse
+    from djingles import pretenses
+    from djingles.warmup import iter_viewsets
+
+    client = client or Client()
+    async_client = async_client or AsyncClient()
+    objects = {}
+    report = []
+    for view_class, initkwargs in iter_viewsets():
+        subview = view_class._actions.get(initkwargs.get("action"))
+        if subview is None or (subview.methods and "GET" not in subview.methods):
+            continue
+        try:
+            model = view_class(**initkwargs).get_queryset().model
+        except Exception:
+            model = None
+        kwargs = {}
+        if model is not None:
+            if model not in objects:
+                pretenses.generate(model, total)
+                objects[model] = model._default_manager.order_by("pk").first()
+            if subview.detail:
+                if objects[model] is None:
+                    continue
+                kwargs["object_id"] = objects[model].pk
+        elif subview.detail:
+            continue
+        url = reverse(initkwargs["url_name"], kwargs=kwargs)
+        with QueryCounter() as counter:
+            if view_class.view_is_async:
+                response = async_to_sync(async_client.get)(url)
+            else:
+                response = client.get(url)
+        entry = counter.as_dict(repeat_limit)
+        entry.update(url=url, name=initkwargs["url_name"], status=response.status_code)
+        report.append(entry)
+    return report
@@ -0,0 +1,79 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+__all__ = ['ReplicaRouter', 'use_replica', 'get_replica_database']
+
+
+class _ReplicaState(object):
+
+    __slots__ = ("alias", "pinned")
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.pinned = False
+
+
+_replica_state = contextvars.ContextVar("djingles_replica_state", default=None)
+
+
+def get_replica_database():
+    return getattr(settings, "READ_REPLICA_DATABASE", None)
+
+
+@contextmanager
+def use_replica(alias=None):
+    """
+    Route reads inside the block to the read replica, until the first write pins
+    the rest of the block to the primary. Does nothing when no replica is configured
+    or when already inside a ``use_replica`` block.
+    """
+    alias = alias or get_replica_database()
+    if not alias or _replica_state.get() is not None:
+        yield
+        return
+    token = _replica_state.set(_ReplicaState(alias))
+    try:
+        yield
+    finally:
+        _replica_state.reset(token)
+
+
+class ReplicaRouter(object):
+    """
+    Database router for ``settings.READ_REPLICA_DATABASE``. Reads go to the replica
+    only inside ``use_replica``, writes always go to the primary. Models of
+    ``primary_apps`` are never read from the replica, a lagging session table would
+    log users out.
+    """
+
+    primary_apps = ("sessions",)
+
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        if state is None or state.pinned or model._meta.app_label in self.primary_apps:
+            return None
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None:
+            state.pinned = True
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == get_replica_database():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, get_replica_database()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == get_replica_database():
+            return False
+        return None
@@ -0,0 +1,81 @@
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from djingles.queries import QueryCounter
+
+
+__all__ = ['ServerTiming', 'timed']
+
+
+logger = logging.getLogger("djingles.timing")
+
+_active_timing = contextvars.ContextVar("djingles_server_timing", default=None)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent in the block, or in the decorated function, to the phase
+    ``name`` of the active ``ServerTiming``. Does nothing when timing is off.
+    """
+    timing = _active_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+class ServerTiming(object):
+    """
+    Collects phase durations and database time for one request and reports them
+    as a ``Server-Timing`` header and a log line on ``djingles.timing``.
+    """
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.queries = QueryCounter()
+        self.total = 0.0
+        self._start = None
+        self._token = None
+
+    def add(self, name, elapsed):
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self.queries.__enter__()
+        self._token = _active_timing.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_timing.reset(self._token)
+        self.queries.__exit__(*exc_info)
+        self.total = time.perf_counter() - self._start
+
+    def header_value(self):
+        metrics = ["%s;dur=%.1f" % (name, elapsed * 1000) for name, elapsed in self.phases.items()]
+        metrics.append('db;dur=%.1f;desc="%d queries"' % (self.queries.time * 1000, self.queries.count))
+        metrics.append("total;dur=%.1f" % (self.total * 1000))
+        return ", ".join(metrics)
+
+    def as_dict(self):
+        result = OrderedDict((name, round(elapsed * 1000, 3)) for name, elapsed in self.phases.items())
+        result["db"] = round(self.queries.time * 1000, 3)
+        result["total"] = round(self.total * 1000, 3)
+        return result
+
+    def apply(self, request, response, label):
+        value = self.header_value()
+        if response.has_header("Server-Timing"):
+            value = "%s, %s" % (response["Server-Timing"], value)
+        response["Server-Timing"] = value
+        logger.info("%s %s %.1fms", label, request.path, self.total * 1000,
+                    extra={"timing": self.as_dict(), "queries": self.queries.count, "view": label})
+        return response
@@ -1,5 +1,6 @@
 
 from importlib import import_module
+import functools
 import pkgutil
 from django.utils.module_loading import module_has_submodule
 import os
@@ -226,6 +227,19 @@ def base64pickle_dumps(data):
 
 
 def iter_app_modules(module_name, deep=False):
+    """
+    Iterate over the ``module_name`` modules of the installed apps. The lookup is
+    done once per process, the app registry does not change after startup.
+    """
+    return iter(_find_app_modules(module_name, deep))
+
+
+@functools.lru_cache(maxsize=None)
+def _find_app_modules(module_name, deep):
+    return list(_iter_app_modules(module_name, deep))
+
+
+def _iter_app_modules(module_name, deep):
     for config in apps.get_app_configs():
         package = config.module
         if module_has_submodule(package, module_name):
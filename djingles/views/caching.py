@@ -0,0 +1,70 @@
+import uuid
+
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+
+
+__all__ = ['model_label', 'watch_models', 'bump_model_version', 'get_model_versions', 'normalize_query']
+
+
+_watched = {}
+
+
+def model_label(model):
+    if isinstance(model, str):
+        return model.lower()
+    return model._meta.label_lower
+
+
+def _version_key(label):
+    return "djingles:model-version:%s" % label
+
+
+def watch_models(models, alias):
+    """
+    Bump the cache version of each model in the cache ``alias`` whenever one of its
+    instances is saved or deleted. Models may be given as ``"app_label.Model"``
+    strings, the signals are then connected once the model is loaded.
+    """
+    for model in models:
+        label = model_label(model)
+        aliases = _watched.get(label)
+        if aliases is None:
+            aliases = _watched[label] = set()
+            post_save.connect(_model_changed, sender=model, weak=False)
+            post_delete.connect(_model_changed, sender=model, weak=False)
+        aliases.add(alias)
+
+
+def _model_changed(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def bump_model_version(model):
+    label = model_label(model)
+    for alias in _watched.get(label, ()):
+        caches[alias].set(_version_key(label), uuid.uuid4().hex, None)
+
+
+def get_model_versions(cache, models):
+    """
+    Current version tokens of ``models``, fetched with a single cache round trip.
+    Missing versions are created, so that an evicted version never comes back with
+    an old value.
+    """
+    keys = [_version_key(model_label(m)) for m in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = uuid.uuid4().hex
+            cache.add(key, token, None)
+            versions[key] = cache.get(key, token)
+    return [versions[key] for key in keys]
+
+
+def normalize_query(data, ignored=()):
+    """
+    The parameters of the QueryDict ``data`` in a stable order, leaving out the names
+    in ``ignored``. Values keep their order, views may depend on it.
+    """
+    return tuple((name, tuple(values)) for name, values in sorted(data.lists()) if name not in ignored)
@@ -1,11 +1,19 @@
 
 
+import functools
+from contextlib import ExitStack
+
 from django import forms
 from django.contrib import messages
 from django.forms.models import ModelForm
+from django.http import Http404
 from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
 from django.views.generic.base import TemplateResponseMixin, View
 from djingles import utils, exceptions
+from djingles.concurrency import evaluate_concurrently
+from djingles.jinja2.responses import StreamingTemplateResponse
+from djingles.timing import ServerTiming, timed
 
 
 __all__ = ['CommonView', 'CommonSessionDataMixin', 'CommonTemplateView', 'CommonFormView']
@@ -40,6 +48,8 @@ class CommonView(View, CommonSessionDataMixin):
     ERROR = messages.ERROR
     SUCCESS = messages.SUCCESS
 
+    server_timing = False
+
     def get_user(self):
         return self.request.user
 
@@ -54,15 +64,25 @@ class CommonView(View, CommonSessionDataMixin):
             return redirect(ex.create_url(request), permanent=ex.permanent)
 
     def dispatch(self, request, *args, **kwargs):
-        try:
-            response = self.process_request(request)
-            if not response:
-                response = super(CommonView, self).dispatch(request, *args, **kwargs)
-        except Exception as ex:
-            response = self.process_exception(request, ex)
-            if response is None:
-                raise
-        response = self.process_response(request, response)
+        with ExitStack() as stack:
+            timing = stack.enter_context(ServerTiming()) if self.server_timing else None
+            try:
+                with timed("request"):
+                    response = self.process_request(request)
+                if not response:
+                    with timed("handler"):
+                        response = super(CommonView, self).dispatch(request, *args, **kwargs)
+            except Exception as ex:
+                response = self.process_exception(request, ex)
+                if response is None:
+                    raise
+            with timed("response"):
+                response = self.process_response(request, response)
+            if timing is not None and not getattr(response, "is_rendered", True):
+                with timed("render"):
+                    response = response.render()
+        if timing is not None:
+            timing.apply(request, response, utils.qualified_name(type(self)))
         return response
 
     def get_context_data(self, **kwargs):
@@ -98,6 +118,8 @@ class CommonTemplateView(CommonView, TemplateResponseMixin):
 
     page_css_class = None
 
+    stream_response = False
+
     def __init__(self, **kwargs):
         super(CommonTemplateView, self).__init__(**kwargs)
         self.extra_context = {}
@@ -109,6 +131,14 @@ class CommonTemplateView(CommonView, TemplateResponseMixin):
     def get_page_css_class(self):
         return self.page_css_class
 
+    def get_concurrent_context_data(self):
+        """
+        Independent context entries to be evaluated in parallel before rendering, see
+        ``djingles.concurrency.evaluate_concurrently``. Querysets are fetched and
+        callables are called, each in a pool thread with its own connection.
+        """
+        return {}
+
     def get_page_title(self):
         return self.page_title or self.get_page_heading()
 
@@ -126,6 +156,9 @@ class CommonTemplateView(CommonView, TemplateResponseMixin):
 
     def render_to_response(self, ctx, **response_kwargs):
         ctx.update(self.extra_context)
+        concurrent = self.get_concurrent_context_data()
+        if concurrent:
+            ctx.update(evaluate_concurrently(concurrent))
         is_ajax = self.request.headers.get('x-requested-with') == 'XMLHttpRequest'
         if not is_ajax:
             ctx['view'] = self
@@ -134,6 +167,9 @@ class CommonTemplateView(CommonView, TemplateResponseMixin):
             ctx.setdefault('page_title', self.get_page_title())
             ctx.setdefault('page_actions', self.get_page_actions())
             ctx.setdefault('page_css_class', self.get_page_css_class())
+        if self.stream_response:
+            return StreamingTemplateResponse(self.request, self.get_template_names(), ctx,
+                                             using=self.template_engine, **response_kwargs)
         response = super(CommonTemplateView, self).render_to_response(ctx, **response_kwargs)
         return response
 
@@ -248,9 +284,16 @@ class CommonFormView(CommonTemplateView):
 
 
 class CommonMultipleFormView(CommonFormView):
+    """
+    Unbound forms are put in the context as lazy objects and only built when the
+    template uses them. With ``fragment_template_name`` set, ``?_fragment=<form_key>``
+    renders that template with just the one form, for forms loaded on demand.
+    """
 
     form_classes = {}
     form_key_parameter = '_fkey'
+    fragment_parameter = '_fragment'
+    fragment_template_name = None
 
     def get_context_form_key(self, form_key):
         suffix = "form"
@@ -282,6 +325,9 @@ class CommonMultipleFormView(CommonFormView):
         return [k for k in self.form_classes.keys() if k != self.get_form_key()]
 
     def get(self, request, *args, **kwargs):
+        fragment = request.GET.get(self.fragment_parameter)
+        if fragment is not None and self.fragment_template_name:
+            return self.render_fragment(fragment)
         key = self.get_form_key()
         if key is None:
             context = self.get_context_data(**kwargs)
@@ -294,10 +340,26 @@ class CommonMultipleFormView(CommonFormView):
             return redirect(request.get_full_path())
         return self.process_submit(key, data=request.POST, files=request.FILES)
 
+    def get_unbound_form(self, form_key):
+        data, files = self.get_form_data(form_key)
+        return self.get_form(form_key=form_key, data=data, files=files)
+
+    def render_fragment(self, form_key):
+        if form_key not in self.form_classes:
+            raise Http404
+        form = self.get_unbound_form(form_key)
+        context = {
+            "view": self,
+            "form": form,
+            "form_key": form_key,
+            self.get_context_form_key(form_key): form,
+        }
+        return self.response_class(request=self.request, template=self.fragment_template_name,
+                                   context=context, using=self.template_engine)
+
     def get_context_data(self, **kwargs):
         context = super(CommonMultipleFormView, self).get_context_data(**kwargs)
         for form_key in self.get_unbound_form_keys():
-            data, files = self.get_form_data(form_key)
-            form = self.get_form(form_key=form_key, data=data, files=files)
+            form = SimpleLazyObject(functools.partial(self.get_unbound_form, form_key))
             context[self.get_context_form_key(form_key)] = form
         return context
@@ -1,15 +1,35 @@
 
-import inspect
 import functools
+import inspect
+import json
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.contrib import messages
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ObjectDoesNotExist
+from django.db.models import Count, Max
 from django.urls import reverse, path
-from django.http.response import Http404, HttpResponse, HttpResponseNotAllowed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http.response import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from django.template import loader, TemplateDoesNotExist
 from django.urls.exceptions import NoReverseMatch
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.functional import classproperty
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+from djingles import utils
+from djingles.queries import QueryCounter, check_query_budget
+from djingles.routers import get_replica_database, use_replica
+from djingles.timing import ServerTiming, timed
+from djingles.jinja2.responses import AsyncTemplateResponse
 
 from djingles.formatters.models import object_formatter_factory, table_formatter_factory
 from djingles.forms import action_model_form_factory
+from djingles.views.caching import get_model_versions, normalize_query, watch_models
 from djingles.views.generic import CommonFormView, CommonTemplateView
 
 from djingles.pagination import Paginator
@@ -24,6 +44,10 @@ __all__ = [
            'DeleteViewSetMixin',
            'DetailViewSetMixin',
             'CloneViewSetMixin',
+            'AsyncViewSetMixin',
+            'AsyncListViewSetMixin',
+            'AsyncDetailViewSetMixin',
+            'AsyncCommonModelViewSet',
             'detail_view',
             'list_view'
            ]
@@ -33,6 +57,7 @@ class _SubView(object):
     detail = False
     regex = None
     methods = None
+    readonly = False
 
     def __init__(self, name, **kwargs):
         for k,v in kwargs.items():
@@ -42,19 +67,15 @@ class _SubView(object):
 
 def view(**kwargs):
     methods = kwargs.pop("methods", None)
+    if methods:
+        methods = [m.upper() for m in methods]
+        # django answers HEAD with the get handler
+        if "GET" in methods and "HEAD" not in methods:
+            methods.append("HEAD")
+        kwargs["methods"] = tuple(methods)
 
     def wrapper(func):
-        subview = _SubView(name=func.__name__, **kwargs)
-        wrapped = func
-        if methods:
-            def closure(self, request, *args, **kw):
-                if methods and request.method not in methods:
-                    return HttpResponseNotAllowed(request.method)
-                response = func(self, request, *args, **kw)
-                return response
-            wrapped = functools.update_wrapper(closure, func)
-
-        wrapped.__subview__ = subview
+        func.__subview__ = _SubView(name=func.__name__, **kwargs)
         return func
 
     return wrapper
@@ -70,10 +91,145 @@ def detail_view(**kwargs):
     return view(**kwargs)
 
 
+@functools.lru_cache(maxsize=None)
+def cached_object_formatter(model_class, fields=None):
+    return object_formatter_factory(model_class, fields=fields)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_table_formatter(model_class, fields=None, base_name=None):
+    """
+    Table formatter linking rows to their ``get_absolute_url``, or to the detail
+    action of the viewset passed as ``view=`` to the table, or else to the detail
+    action routed under ``base_name``.
+    """
+    def get_cell_url(table, cell):
+        source = cell.source
+        if hasattr(source, 'get_absolute_url'):
+            return source.get_absolute_url()
+        view = table.context.get("view")
+        if view is not None:
+            return view.reverse("detail", object_id=source.id)
+        if base_name is not None:
+            return reverse("%s_detail" % base_name, kwargs={"object_id": source.id})
+
+    return table_formatter_factory(model_class, fields=fields, get_cell_url=get_cell_url)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_action_form(model_class, include=None):
+    return action_model_form_factory(model_class, include=include)
+
+
+def _as_key(fields):
+    return tuple(fields) if fields is not None else None
+
+
+def find_actions(cls):
+    """
+    Actions declared on ``cls`` and its bases, by name. Only class dictionaries are
+    looked at, so properties and descriptors are never evaluated. An attribute
+    overridden without the ``view`` decorator hides the action it overrides.
+    """
+    seen = set()
+    actions = {}
+    for klass in cls.__mro__:
+        for name, value in vars(klass).items():
+            if name in seen:
+                continue
+            seen.add(name)
+            subview = getattr(value, '__subview__', None)
+            if subview is not None and callable(value):
+                actions[name] = subview
+    return dict(sorted(actions.items()))
+
+
+def _iter_json(meta, rows):
+    yield '{"meta": %s, "results": [' % json.dumps(meta, cls=DjangoJSONEncoder)
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+        separator = ", "
+    yield "]}"
+
+
+def _iter_jsonl(meta, rows):
+    yield json.dumps(meta, cls=DjangoJSONEncoder) + "\n"
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+JSON_FORMATS = {
+    "json": (_iter_json, "application/json"),
+    "jsonl": (_iter_jsonl, "application/x-ndjson"),
+}
+
+_ACCEPTED_JSON_TYPES = {
+    "application/json": "json",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+def _parse_accept(accept):
+    """
+    ``(quality, position, media_type)`` for each entry of an Accept header.
+    """
+    result = []
+    for position, entry in enumerate(accept.split(",")):
+        media_type, _, params = entry.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        result.append((quality, position, media_type.strip().lower()))
+    return result
+
+
+def _accepted_json_format(accept):
+    """
+    The json format the Accept header ranks above html, or None. Html is matched by
+    ``text/html``, else ``text/*``, else ``*/*``; on equal quality the type listed
+    first wins.
+    """
+    best = None
+    html = {}
+    for quality, position, media_type in _parse_accept(accept):
+        json_format = _ACCEPTED_JSON_TYPES.get(media_type)
+        if json_format is not None:
+            if quality > 0 and (best is None or quality > best[0]):
+                best = (quality, position, json_format)
+        elif media_type in ("text/html", "text/*", "*/*"):
+            html.setdefault(media_type, (quality, position))
+    if best is None:
+        return None
+    for media_type in ("text/html", "text/*", "*/*"):
+        if media_type in html:
+            quality, position = html[media_type]
+            if quality > best[0] or (quality == best[0] and position < best[1]):
+                return None
+            break
+    return best[2]
+
+
+async def _call_async(func, *args, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    result = await sync_to_async(func)(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 def get_child_views(cls):
-    for name, func in inspect.getmembers(cls):
-        if callable(func) and hasattr(func, '__subview__'):
-            yield func.__subview__
+    actions = cls.__dict__.get("_actions")
+    if actions is None:
+        actions = find_actions(cls)
+    return iter(actions.values())
 
 
 class ViewSetMixin:
@@ -83,6 +239,16 @@ class ViewSetMixin:
     url_name = None
     url_regex = None
 
+    query_budget = None
+    query_repeat_limit = None
+    query_budget_fail = False
+
+    _actions = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._actions = find_actions(cls)
+
     def check_object_permissions(self, obj):
         pass
 
@@ -99,13 +265,67 @@ class ViewSetMixin:
         url_name = "%s_%s" % (self.base_name, action_name)
         return reverse(url_name, kwargs=kwargs)
 
-    def get(self, request, *args, **kwargs):
+    def run_action(self, request):
+        subview = self._actions.get(self.action)
+        methods = subview.methods if subview is not None else None
+        if methods and request.method not in methods:
+            return HttpResponseNotAllowed(methods)
         self.check_permissions()
-        return getattr(self, self.action)(request)
+        replica = subview is not None and subview.readonly and get_replica_database()
+        counted = self.is_query_counted()
+        if not replica and not counted:
+            return getattr(self, self.action)(request)
+        with ExitStack() as stack:
+            if replica:
+                stack.enter_context(use_replica(replica))
+            counter = stack.enter_context(QueryCounter()) if counted else None
+            response = getattr(self, self.action)(request)
+            if hasattr(response, "render") and callable(response.render):
+                with timed("render"):
+                    response = response.render()
+        if counter is not None:
+            self.check_query_budget(counter)
+        return response
+
+    def get_query_budget(self):
+        budget = self.query_budget
+        if isinstance(budget, dict):
+            return budget.get(self.action)
+        return budget
+
+    def is_query_counted(self):
+        return self.get_query_budget() is not None or bool(self.query_repeat_limit)
+
+    def check_query_budget(self, counter):
+        """
+        Log, or raise with ``query_budget_fail``, when the action and its rendering ran
+        more queries than ``query_budget`` (a number, or a dict by action) or ran one
+        query ``query_repeat_limit`` times.
+        """
+        label = "%s.%s" % (type(self).__name__, self.action)
+        check_query_budget(counter, label, self.get_query_budget(), self.query_repeat_limit,
+                           fail=self.query_budget_fail)
+
+    def get(self, request, *args, **kwargs):
+        return self.run_action(request)
 
     def post(self, request, *args, **kwargs):
-        self.check_permissions()
-        return getattr(self, self.action)(request)
+        return self.run_action(request)
+
+    def warmup(self):
+        """
+        Resolve the templates of every action ahead of the first request. Subclasses
+        extend this to build whatever else they create lazily.
+        """
+        if getattr(self, "template_name", None) is None:
+            return
+        for subview in self.get_action_list():
+            self.action = subview.name
+            try:
+                loader.select_template(self.get_template_names())
+            except TemplateDoesNotExist:
+                pass
+        self.action = None
 
     def process_response(self, request, response):
         if isinstance(response, dict):
@@ -114,9 +334,7 @@ class ViewSetMixin:
 
     @classmethod
     def get_action_list(cls):
-        for name, func in inspect.getmembers(cls):
-            if callable(func) and hasattr(func, '__subview__'):
-                yield func.__subview__
+        return iter(cls._actions.values())
 
     @classmethod
     def as_urls(cls, base_name, url_name=None, **kwargs):
@@ -150,15 +368,25 @@ class ViewSetMixin:
 
 class DetailViewSetMixin(object):
 
-    @view(detail=True, regex="")
+    @view(detail=True, regex="", readonly=True)
     def detail(self, request):
         self.object = self.get_object()
+        response = self.check_object_modified(self.object)
+        if response is not None:
+            return response
+        return self.render_detail()
+
+    def render_detail(self):
         ctx = {
             self.context_object_key: self.object
         }
         object_formatter = self.get_object_formatter()
         if object_formatter:
-            ctx[self.context_formatted_object_key] = object_formatter(self.object, variant="detail")
+            with timed("formatter"):
+                formatted_object = object_formatter(self.object, variant="detail")
+            if self.get_json_format():
+                return JsonResponse(formatted_object.to_dict(), encoder=DjangoJSONEncoder)
+            ctx[self.context_formatted_object_key] = formatted_object
         context = self.get_context_data(**ctx)
         return self.render_to_response(context)
 
@@ -200,29 +428,140 @@ class ListViewSetMixin(object):
     context_page_key = 'object_list_page'
     context_order_key = 'order'
 
-    @view(regex="")
+    list_cache_timeout = None
+    list_cache_alias = 'default'
+    list_cache_models = None
+    list_cache_ignored_params = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.list_cache_timeout:
+            watch_models(cls.get_list_cache_models(), cls.list_cache_alias)
+
+    @classmethod
+    def get_list_cache_models(cls):
+        if cls.list_cache_models is not None:
+            return cls.list_cache_models
+        queryset = getattr(cls, "queryset", None)
+        if queryset is None:
+            raise ImproperlyConfigured("%s caches its list but has no queryset, set list_cache_models"
+                                       % cls.__name__)
+        return [queryset.model]
+
+    def is_list_cacheable(self):
+        if not self.list_cache_timeout or self.request.method != "GET" or self.get_json_format():
+            return False
+        if self.stream_response:
+            return False
+        return not len(messages.get_messages(self.request))
+
+    def get_list_cache_scope(self):
+        """
+        Who may share a cached list page, by default each user has their own. Override
+        to share pages between users with the same permissions.
+        """
+        user = getattr(self, "user", None)
+        return getattr(user, "pk", None)
+
+    def get_list_cache_key(self):
+        """
+        Every query parameter may change the page, from the filter form or from
+        ``get_queryset`` and the context, so all of them are part of the key except
+        ``list_cache_ignored_params``, such as tracking parameters.
+        """
+        params = normalize_query(self.request.GET, self.list_cache_ignored_params)
+        cache = caches[self.list_cache_alias]
+        versions = get_model_versions(cache, self.get_list_cache_models())
+        return "djingles:list:%s" % utils.create_hash(
+            utils.qualified_name(type(self)), self.base_name, self.action, sorted(self.kwargs.items()),
+            params, self.get_list_cache_scope(), get_language(), versions
+        )
+
+    def store_list_response(self, cache_key, response):
+        if response.status_code != 200 or response.cookies:
+            return
+        if self.request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            return
+        # the response may be rendered before process_response set the validators
+        self.patch_validators(response)
+        # a plain response, an unpickled TemplateResponse has no template or context
+        # left for the template response middleware
+        cached = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            cached[header] = value
+        caches[self.list_cache_alias].set(cache_key, cached, self.list_cache_timeout)
+
+    def get_list_meta(self, page):
+        meta = {"sort": self.request.GET.get(self.context_order_key) or None}
+        paginator = getattr(page, "paginator", None)
+        if paginator is not None:
+            meta.update(count=paginator.count, page=page.number, num_pages=paginator.num_pages)
+        return meta
+
+    def render_json_list(self, table, page, json_format):
+        """
+        Stream the formatted rows of ``table`` as a json document with ``meta`` and
+        ``results`` keys, or as json lines with the meta on the first line.
+        """
+        generate, content_type = JSON_FORMATS[json_format]
+        meta = self.get_list_meta(page)
+        meta["columns"] = [{"name": col.name, "label": str(col.label)} for col in table.columns.visible_columns()]
+        return StreamingHttpResponse(generate(meta, table.iter_dicts()), content_type=content_type)
+
+    def get_cached_list(self):
+        """
+        Returns the cache key of the current list page and the cached response, if
+        any. The key is None when the page is not cacheable.
+        """
+        cache_key = self.get_list_cache_key() if self.is_list_cacheable() else None
+        if cache_key is None:
+            return None, None
+        response = caches[self.list_cache_alias].get(cache_key)
+        if response is not None and response.has_header("ETag") and self.is_conditional():
+            response = self.not_modified(response["ETag"]) or response
+        return cache_key, response
+
+    @view(regex="", readonly=True)
     def list(self, request):
+        cache_key, response = self.get_cached_list()
+        if response is not None:
+            return response
+
         object_list_formatter = self.get_object_list_formatter()
 
         object_list = self.filter_queryset(self.get_queryset(), formatter_class=object_list_formatter)
 
-        filter_form = self.filter_form
+        response = self.check_list_modified(object_list)
+        if response is not None:
+            return response
 
-        ctx = {}
+        page = self.paginate_queryset(object_list)
+        return self.render_list(object_list_formatter, page, cache_key)
 
-        object_list = self.paginate_queryset(object_list)
+    def render_list(self, object_list_formatter, page, cache_key=None):
+        filter_form = self.filter_form
 
-        ctx[self.context_page_key] = object_list
+        ctx = {self.context_page_key: page}
 
+        object_list = page
         if object_list_formatter:
-            object_list = object_list_formatter(object_list,
-                                                sort_key=self.context_order_key,
-                                                sort_field=filter_form.fields.get(self.context_order_key) if filter_form else None)
+            with timed("formatter"):
+                object_list = object_list_formatter(object_list,
+                                                    view=self,
+                                                    sort_key=self.context_order_key,
+                                                    sort_field=filter_form.fields.get(self.context_order_key) if filter_form else None)
+
+        json_format = self.get_json_format()
+        if json_format and object_list_formatter:
+            return self.render_json_list(object_list, page, json_format)
 
         ctx[self.context_object_list_key] = object_list
 
         ctx['filter_form'] = self.filter_form
-        return self.render_to_response(self.get_context_data(**ctx))
+        response = self.render_to_response(self.get_context_data(**ctx))
+        if cache_key is not None and hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(functools.partial(self.store_list_response, cache_key))
+        return response
 
 
 class CommonViewSet(ViewSetMixin, CommonTemplateView):
@@ -247,6 +586,12 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
     params_page_key = 'page'
     per_page = None
 
+    conditional_actions = ()
+    conditional_field = 'updated'
+
+    allow_json = False
+    params_format_key = 'format'
+
     OK_BACK = 1
     YES_BACK = 2
     CONFIRM_BACK = 3
@@ -259,14 +604,93 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
         self.form_initial = {}
         self.form_instance = None
         self.filter_form = None
+        self.validators = None
 
     def render_to_response(self, ctx, **response_kwargs):
         self.extra_context.update(ctx)
         return super(CommonModelViewSet, self).render_to_response(self.extra_context, **response_kwargs)
 
+    def process_response(self, request, response):
+        response = super(CommonModelViewSet, self).process_response(request, response)
+        if self.allow_json:
+            patch_vary_headers(response, ["Accept"])
+        self.patch_validators(response)
+        return response
+
+    def patch_validators(self, response):
+        """
+        Set the ``ETag`` and ``Last-Modified`` headers computed by the conditional
+        checks of the current action, if any.
+        """
+        if self.validators and response.status_code == 200:
+            etag, last_modified = self.validators
+            if not response.has_header("ETag"):
+                response["ETag"] = etag
+            if last_modified is not None and not response.has_header("Last-Modified"):
+                response["Last-Modified"] = http_date(last_modified)
+
     def get_queryset(self):
         return self.queryset.all()
 
+    def is_conditional(self):
+        """
+        Whether the current action answers conditional requests. Pages carrying
+        pending messages are always rendered in full.
+        """
+        if self.action not in self.conditional_actions or self.request.method not in ("GET", "HEAD"):
+            return False
+        return not len(messages.get_messages(self.request))
+
+    def get_json_format(self):
+        """
+        ``"json"`` or ``"jsonl"`` when ``allow_json`` is set and the client asked for
+        it through the ``format`` parameter, or through an Accept header ranking it
+        above html, else None.
+        """
+        if not self.allow_json:
+            return None
+        value = self.request.GET.get(self.params_format_key)
+        if value in JSON_FORMATS:
+            return value
+        return _accepted_json_format(self.request.headers.get("Accept", ""))
+
+    def get_etag(self, *parts):
+        user = getattr(self, "user", None)
+        return quote_etag(utils.create_hash(self.base_name, self.action, getattr(user, "pk", None),
+                                            get_language(), self.get_json_format(), *parts))
+
+    def not_modified(self, etag, last_modified=None):
+        self.validators = (etag, last_modified)
+        return get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+
+    def check_object_modified(self, obj):
+        """
+        Returns a 304 (or 412) response when the client's copy of ``obj`` is current,
+        judged by its ``conditional_field``.
+        """
+        if not self.is_conditional():
+            return
+        updated = getattr(obj, self.conditional_field, None)
+        if not hasattr(updated, "timestamp"):
+            return
+        return self.not_modified(self.get_etag(obj.pk, updated), int(updated.timestamp()))
+
+    def check_list_modified(self, queryset):
+        """
+        Like ``check_object_modified`` for a filtered queryset, using the latest
+        ``conditional_field`` value, the row count and the query parameters.
+        """
+        if not self.is_conditional():
+            return
+        try:
+            queryset.model._meta.get_field(self.conditional_field)
+        except FieldDoesNotExist:
+            return
+        stats = queryset.order_by().aggregate(latest=Max(self.conditional_field), count=Count("pk"))
+        params = sorted(self.request.GET.lists())
+        return self.not_modified(self.get_etag(stats["latest"], stats["count"], params))
+
+    @timed("filter")
     def filter_queryset(self, queryset, **kwargs):
         self.filter_form = self.get_filter_form(**kwargs)
         if self.filter_form:
@@ -284,30 +708,31 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
     def get_object_formatter(self):
         if self.object_formatter is None:
             model_class = self.get_queryset().model
-            self.object_formatter = object_formatter_factory(
-                model_class,
-                fields=self.object_formatter_fields
-            )
+            self.object_formatter = cached_object_formatter(model_class, _as_key(self.object_formatter_fields))
         return self.object_formatter
 
     def get_object_list_formatter(self):
         if self.object_list_formatter is None:
             model_class = self.get_queryset().model
-            self.object_list_formatter = table_formatter_factory(
-                model_class,
-                fields=self.object_list_formatter_fields,
-                get_cell_url=lambda me, cell: cell.source.get_absolute_url() if
-                        hasattr(cell.source, 'get_absolute_url') else self.reverse("detail", object_id=cell.source.id)
-            )
+            self.object_list_formatter = cached_table_formatter(model_class,
+                                                                _as_key(self.object_list_formatter_fields),
+                                                                self.base_name)
         return self.object_list_formatter
 
     def get_form_class(self, form_key=None):
         form_class = super(CommonModelViewSet, self).get_form_class(form_key)
         if form_class is None:
             model_class = self.get_queryset().model
-            form_class = action_model_form_factory(model_class, include=self.action_fields)
+            form_class = cached_action_form(model_class, _as_key(self.action_fields))
         return form_class
 
+    def warmup(self):
+        super(CommonModelViewSet, self).warmup()
+        self.get_object_formatter()
+        self.get_object_list_formatter()
+        self.get_form_class()
+        self.get_filter_class()
+
     def get_filter_initial(self):
         return None
 
@@ -318,6 +743,7 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
             kwargs["context"].update(extra)
             return filter_class(**kwargs)
 
+    @timed("paginate")
     def paginate_queryset(self, queryset, per_page=None, params_page_key=None):
         if per_page is None:
             per_page = self.per_page
@@ -332,6 +758,7 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
             allow_empty=False
         ).page(self.request)
 
+    @timed("get_object")
     def get_object(self):
         queryset = self.get_queryset()
         try:
@@ -403,3 +830,153 @@ class CommonModelViewSet(ViewSetMixin, CommonFormView):
                 return redirect(self.get_previous_url())
 
 
+
+
+class AsyncViewSetMixin(ViewSetMixin):
+    """
+    Dispatches on the event loop under ASGI. Coroutine actions are awaited directly,
+    plain actions and the request hooks run in a worker thread.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return True
+
+    def get_user(self):
+        user = super(AsyncViewSetMixin, self).get_user()
+        # resolve the lazy user here, in the worker thread running process_request
+        user.is_authenticated
+        return user
+
+    async def dispatch(self, request, *args, **kwargs):
+        with ExitStack() as stack:
+            timing = stack.enter_context(ServerTiming()) if self.server_timing else None
+            try:
+                with timed("request"):
+                    response = await sync_to_async(self.process_request)(request)
+                if not response:
+                    method = request.method.lower()
+                    if method in self.http_method_names:
+                        handler = getattr(self, method, self.http_method_not_allowed)
+                    else:
+                        handler = self.http_method_not_allowed
+                    with timed("handler"):
+                        response = await _call_async(handler, request, *args, **kwargs)
+            except Exception as ex:
+                response = self.process_exception(request, ex)
+                if response is None:
+                    raise
+            with timed("response"):
+                response = self.process_response(request, response)
+            if timing is not None and not getattr(response, "is_rendered", True):
+                with timed("render"):
+                    response = await _call_async(response.render)
+        if timing is not None:
+            timing.apply(request, response, utils.qualified_name(type(self)))
+        return response
+
+    async def run_action(self, request):
+        subview = self._actions.get(self.action)
+        methods = subview.methods if subview is not None else None
+        if methods and request.method not in methods:
+            return HttpResponseNotAllowed(methods)
+        await sync_to_async(self.check_permissions)()
+        replica = subview is not None and subview.readonly and get_replica_database()
+        counted = self.is_query_counted()
+        if not replica and not counted:
+            return await _call_async(getattr(self, self.action), request)
+        with ExitStack() as stack:
+            if replica:
+                stack.enter_context(use_replica(replica))
+            counter = stack.enter_context(QueryCounter()) if counted else None
+            response = await _call_async(getattr(self, self.action), request)
+            if hasattr(response, "render") and callable(response.render):
+                with timed("render"):
+                    response = await _call_async(response.render)
+        if counter is not None:
+            self.check_query_budget(counter)
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        return await self.run_action(request)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.run_action(request)
+
+
+class AsyncDetailViewSetMixin(DetailViewSetMixin):
+
+    @view(detail=True, regex="", readonly=True)
+    async def detail(self, request):
+        with timed("get_object"):
+            self.object = await self.aget_object()
+        response = await sync_to_async(self.check_object_modified)(self.object)
+        if response is not None:
+            return response
+        return await sync_to_async(self.render_detail)()
+
+
+class AsyncListViewSetMixin(ListViewSetMixin):
+    """
+    The list action with counting and fetching of the page done through the async
+    ORM. Filter forms are validated in a worker thread, since model choice fields
+    query the database, and so are the formatters and the context, which may follow
+    relations. Rows are fetched before rendering, related objects the templates of an
+    async environment touch should be loaded with ``select_related``.
+    """
+
+    @view(regex="", readonly=True)
+    async def list(self, request):
+        cache_key, response = await sync_to_async(self.get_cached_list)()
+        if response is not None:
+            return response
+
+        object_list_formatter = self.get_object_list_formatter()
+
+        object_list = await sync_to_async(self.filter_queryset)(self.get_queryset(),
+                                                                formatter_class=object_list_formatter)
+
+        response = await sync_to_async(self.check_list_modified)(object_list)
+        if response is not None:
+            return response
+
+        with timed("paginate"):
+            page = await self.apaginate_queryset(object_list)
+        return await sync_to_async(self.render_list)(object_list_formatter, page, cache_key)
+
+    async def apaginate_queryset(self, queryset, per_page=None, params_page_key=None):
+        if per_page is None:
+            per_page = self.per_page
+        if params_page_key is None:
+            params_page_key = self.params_page_key
+        if not per_page:
+            return [obj async for obj in queryset]
+        paginator = self.paginator(
+            queryset,
+            per_page=per_page,
+            parameter_name=params_page_key,
+            allow_empty=False
+        )
+        paginator.__dict__["count"] = await queryset.acount()
+        page = paginator.page(self.request)
+        page.object_list = [obj async for obj in page.object_list]
+        return page
+
+
+class AsyncCommonModelViewSet(AsyncViewSetMixin, CommonModelViewSet):
+    """
+    CommonModelViewSet for ASGI deployments. Combine with ``AsyncListViewSetMixin``
+    and ``AsyncDetailViewSetMixin`` for async list and detail actions, the other
+    actions run in a worker thread. Routed with ``as_urls`` like any viewset.
+    """
+
+    response_class = AsyncTemplateResponse
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        try:
+            obj = await queryset.aget(pk=self.kwargs[self.url_object_key])
+        except queryset.model.DoesNotExist:
+            raise Http404
+        await sync_to_async(self.check_object_permissions)(obj)
+        return obj
@@ -0,0 +1,111 @@
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.urls import URLResolver, get_resolver
+
+
+__all__ = ['warmup', 'iter_viewsets', 'postfork']
+
+
+logger = logging.getLogger("djingles.warmup")
+
+
+def iter_viewsets(resolver=None):
+    """
+    Yield ``(view_class, initkwargs)`` for every viewset action routed by the urlconf.
+    """
+    from djingles.views.viewsets import ViewSetMixin
+    if resolver is None:
+        resolver = get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_viewsets(pattern)
+            continue
+        view_class = getattr(pattern.callback, "view_class", None)
+        if view_class is not None and issubclass(view_class, ViewSetMixin):
+            yield view_class, pattern.callback.view_initkwargs
+
+
+@contextmanager
+def _timed(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def warm_viewsets():
+    seen = set()
+    count = 0
+    for view_class, initkwargs in iter_viewsets():
+        key = (view_class, initkwargs.get("base_name"))
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            view_class(**initkwargs).warmup()
+        except Exception:
+            logger.warning("Could not warm up %s", view_class.__name__, exc_info=True)
+        else:
+            count += 1
+    return count
+
+
+def warm_widgets():
+    from djingles.forms.widgets import AbstractThemedWidget
+    for widget_class in AbstractThemedWidget.widget_classes().values():
+        widget_class.widget_classes()
+
+
+def warm_templates(log_function=None):
+    """
+    Compile the templates of every jinja2 environment, skipping the python files of
+    app ``jinja2`` packages. Returns the number of templates compiled.
+    """
+    from djingles.jinja2 import get_environments, compile_templates
+    return sum(compile_templates(env, log_function=log_function) for env in get_environments())
+
+
+def warmup(links=(), log_function=None):
+    """
+    Build what djingles otherwise builds during the first requests of a process: the
+    url resolver, formatter and form classes of every routed viewset, themed widget
+    lookups, compiled templates and the trees of the given root ``links``.
+
+    Returns the seconds spent per phase.
+    """
+    timings = OrderedDict()
+    with _timed(timings, "urls"):
+        get_resolver().reverse_dict
+    with _timed(timings, "viewsets"):
+        warm_viewsets()
+    with _timed(timings, "widgets"):
+        warm_widgets()
+    with _timed(timings, "templates"):
+        warm_templates(log_function=log_function)
+    with _timed(timings, "links"):
+        for link in links:
+            link.compile()
+    logger.info("Warm up took %.3fs", sum(timings.values()), extra={"timings": dict(timings)})
+    return timings
+
+
+def postfork():
+    """
+    Entry point for uwsgi workers, see ``register_postfork``.
+    """
+    import django
+    django.setup()
+    warmup()
+
+
+def register_postfork():
+    """
+    Run ``warmup`` in every uwsgi worker after it has been forked. Call this from the
+    module given to uwsgi's ``import`` option.
+    """
+    from uwsgidecorators import postfork as uwsgi_postfork
+    uwsgi_postfork(postfork)
@@ -39,7 +39,7 @@ setup(
     install_requires=[
         "python-dateutil",
         "jinja2>=3",
-        "django>=4",
+        "django>=4.1",
         "djangorestframework",
     ],
     python_requires='>=3',